@@ -0,0 +1,214 @@
+"""
+Long-lived compliance advisor service.
+
+Loads the embedding model and the vector index once, then answers
+JSON requests on a local HTTP port:
+
+    POST /advise   {"facility_type": "restaurant", "division": "1"?, "scope": "Title 17"?,
+                    "expand": true?}
+        -> advise() result plus "text", the exact CLI output
+    GET  /health
+    GET  /metrics  Prometheus text: stage latencies, embed/upsert counters
+
+Requests are served on concurrent threads. Their query embeddings are
+micro-batched: the first request to arrive opens a short window, and
+every request that shows up within it is encoded in the same forward pass.
+Connections wait in a listen backlog of --backlog (default 128) while
+every thread is busy, instead of being reset past socketserver's 5.
+
+    python agent/advisor_server.py [--port 8765] [--batch-window-ms 5] [--backlog 128]
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from embedder import Embedder
+from facility_advisor import FACILITY_RULES, advise, load_collection, render, resolve_scope
+from hybrid_search import HybridRetriever, load_bm25
+from vector_backends import BACKENDS, DEFAULT_BACKEND
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+import metrics  # noqa: E402
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BACKLOG = 128
+DEFAULT_BATCH_WINDOW_MS = 5
+MAX_BATCH = 64
+
+
+class QueryBatcher:
+    """Encodes queries from many threads in shared model calls."""
+
+    def __init__(self, embedder, window=DEFAULT_BATCH_WINDOW_MS / 1000,
+                 max_batch=MAX_BATCH):
+        self.embedder = embedder
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def encode(self, text):
+        future = Future()
+        self.requests.put((text, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.embedder.encode(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector.tolist())
+
+
+def make_handler(collection, batcher, retriever=None):
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == "/metrics":
+                body = metrics.REGISTRY.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if path != "/health":
+                self._send(404, {"error": "not found"})
+                return
+            self._send(200, {
+                "status": "ok",
+                "sections": collection.count(),
+                "embedding_batches": batcher.batches,
+            })
+
+        def do_POST(self):
+            if urlsplit(self.path).path != "/advise":
+                self._send(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                facility_type = str(payload.get("facility_type", "")).strip().lower()
+                division = str(payload.get("division") or "").strip() or None
+                scope = str(payload.get("scope") or "").strip() or None
+                expand = bool(payload.get("expand"))
+            except (ValueError, AttributeError):
+                self._send(400, {"error": "expected a JSON object"})
+                return
+
+            if facility_type not in FACILITY_RULES:
+                self._send(400, {
+                    "error": "unsupported facility type",
+                    "supported": sorted(FACILITY_RULES),
+                })
+                return
+
+            if scope:
+                try:
+                    resolve_scope(scope)
+                except ValueError as e:
+                    self._send(400, {"error": str(e)})
+                    return
+
+            started = time.perf_counter()
+            result = advise(facility_type, collection, batcher.encode(facility_type),
+                            division, retriever, scope, expand)
+            result["text"] = render(result)
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            metrics.observe("request_seconds", result["latency_ms"] / 1000, endpoint="advise")
+            self._send(200, result)
+
+        def log_message(self, fmt, *args):
+            print(f"🌐 {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+class AdvisorServer(ThreadingHTTPServer):
+    def __init__(self, address, handler, backlog=DEFAULT_BACKLOG):
+        # Read by server_activate() (listen) during __init__
+        self.request_queue_size = backlog
+        super().__init__(address, handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the compliance advisor over HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG,
+                        help="pending connections queued before new ones are refused")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW_MS,
+                        help="how long to gather concurrent queries into one batch")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="vector store: Chroma or the local flat/IVF index")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="fuse BM25 and vector retrieval (per-stage timings in responses)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    started = time.perf_counter()
+    collection = load_collection(args.backend)
+    embedder = Embedder(use_cache=True)
+    batcher = QueryBatcher(embedder, window=args.batch_window_ms / 1000)
+    retriever = HybridRetriever(collection, load_bm25()) if args.hybrid else None
+    print(f"🔥 Model and index loaded in {time.perf_counter() - started:.1f}s "
+          f"({collection.count()} sections)")
+
+    server = AdvisorServer((args.host, args.port), make_handler(collection, batcher, retriever),
+                           args.backlog)
+    print(f"🚀 Advisor listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        embedder.close()
+        if retriever is not None:
+            retriever.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,89 @@
+import argparse
 import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
 
-SECTIONS_FILE = Path("data/sections_content.jsonl")
+from inverted_index import INDEX_FILE, SECTIONS_FILE, InvertedIndex, load_or_build, tokenize
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+import metrics  # noqa: E402
+import section_store  # noqa: E402
+from section_store import SectionStore  # noqa: E402
+
 REPORTS_DIR = Path("reports")
 REPORTS_DIR.mkdir(exist_ok=True)
 
-def load_sections():
-    sections = []
-    with open(SECTIONS_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                sections.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
-    return sections
+MIN_TERM_LENGTH = 7
+MAX_MATCHED_TERMS = 10
 
-def check_compliance(policy_text, sections):
-    findings = []
-
-    policy_text_lower = policy_text.lower()
+# Batch mode
+BATCH_OUTPUT = REPORTS_DIR / "compliance_batch.jsonl"
+POLICY_SUFFIXES = {".txt", ".md"}
+POLICY_CHUNK = 32
+CHUNKS_PER_WORKER = 4
+PROGRESS_EVERY = 500
 
-    for section in sections:
-        content = section.get("content", "").lower()
-        if not content:
-            continue
+def policy_terms(policy_text):
+    """Distinct policy words worth matching, in policy order."""
+    return list(dict.fromkeys(
+        token for token in tokenize(policy_text) if len(token) >= MIN_TERM_LENGTH
+    ))
 
-        # Simple but valid compliance heuristic (PDF-acceptable)
-        matches = [
-            word for word in policy_text_lower.split()
-            if len(word) > 6 and word in content
-        ]
+def check_compliance(policy_text, index, mode="any"):
+    """
+    Sections sharing policy terms, answered from the inverted index
+    (whole-token matches) or a SectionStore's FTS5 index, which share the
+    search()/entry() interface. mode="all" requires every term in a section.
+    """
+    findings = []
 
-        if matches:
+    # Simple but valid compliance heuristic (PDF-acceptable)
+    with metrics.span("query", source="compliance"):
+        for doc, matches in index.search(policy_terms(policy_text), mode).items():
+            section = index.entry(doc)
             findings.append({
                 "section_url": section["url"],
                 "section_title": section.get("section_title", "Unknown Section"),
-                "matched_terms": list(set(matches[:10])),
+                "matched_terms": matches[:MAX_MATCHED_TERMS],
                 "risk_level": "Review Required"
             })
 
     return findings
 
-def generate_report(policy_text):
-    sections = load_sections()
-    results = check_compliance(policy_text, sections)
+def policy_record(policy_id, policy_text, index, mode="any"):
+    results = check_compliance(policy_text, index, mode)
+    return {
+        "policy_id": policy_id,
+        "policy_summary": policy_text[:300] + "...",
+        "match_mode": mode,
+        "potential_issues_found": len(results),
+        "findings": results
+    }
+
+def open_index(store=None, rebuild_index=False):
+    """The section store when given (no index to build), else the inverted index."""
+    if store:
+        if not Path(store).exists():
+            raise FileNotFoundError(f"{store}: run clean_sections.py --store first")
+        return SectionStore(store)
+    return load_or_build(SECTIONS_FILE, rebuild=rebuild_index)
+
+def generate_report(policy_text, mode="any", rebuild_index=False, store=None):
+    index = open_index(store, rebuild_index)
+
+    started = time.perf_counter()
+    results = check_compliance(policy_text, index, mode)
+    elapsed_ms = (time.perf_counter() - started) * 1000
 
     report = {
         "policy_summary": policy_text[:300] + "...",
-        "total_sections_checked": len(sections),
+        "total_sections_checked": len(index),
+        "match_mode": mode,
         "potential_issues_found": len(results),
         "findings": results
     }
@@ -57,14 +93,125 @@ def generate_report(policy_text):
         json.dump(report, f, indent=2)
 
     print(f"\n✅ Compliance report generated: {output_file}")
-    print(f"🔍 Sections checked: {len(sections)}")
+    print(f"🔍 Sections checked: {len(index)} in {elapsed_ms:.2f} ms")
     print(f"⚠️ Potential issues found: {len(results)}")
 
-if __name__ == "__main__":
-    sample_policy = """
-    Our organization collects personal data from users and may share
-    information with third-party service providers. Data retention
-    policies apply and disclosures may be required.
+# --------------------------------------------------
+# Batch mode: many policies, one corpus load, streamed JSONL
+# --------------------------------------------------
+
+def iter_policies(path):
+    """
+    (policy_id, text) from a directory of .txt/.md files (id = relative
+    path) or a JSONL file of {"id", "text"} objects ("policy" also
+    accepted for the text; id defaults to the line number).
     """
+    path = Path(path)
+
+    if path.is_dir():
+        for file in sorted(path.rglob("*")):
+            if file.is_file() and file.suffix.lower() in POLICY_SUFFIXES:
+                yield str(file.relative_to(path)), file.read_text(encoding="utf-8", errors="replace")
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ {path}:{line_no}: not JSON, skipped")
+                continue
+            text = record.get("text") or record.get("policy") or ""
+            yield str(record.get("id", line_no)), text
+
+_worker_index = None
+
+def _init_worker(index_path, store=None):
+    global _worker_index
+    _worker_index = SectionStore(store) if store else InvertedIndex.load(index_path)
+
+def _check_chunk(chunk, mode):
+    return [policy_record(pid, text, _worker_index, mode) for pid, text in chunk]
+
+def _checked_chunks(policies, index, mode, workers, store=None):
+    """Lists of policy records, each yielded as soon as its chunk finishes."""
+    chunks = iter(lambda: list(islice(policies, POLICY_CHUNK)), [])
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield [policy_record(pid, text, index, mode) for pid, text in chunk]
+        return
+
+    # Each worker loads the persisted index (or opens the store) once, not per policy
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(INDEX_FILE), store)) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_check_chunk, chunk, mode))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        for future in wait(pending).done:
+            yield future.result()
+
+def run_batch(policies_path, output=BATCH_OUTPUT, mode="any", workers=None,
+              rebuild_index=False, store=None):
+    index = open_index(store, rebuild_index)
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    checked = flagged = 0
+    last_report = 0
+
+    with open(output, "w", encoding="utf-8") as out:
+        for records in _checked_chunks(iter_policies(policies_path), index, mode, workers,
+                                       store):
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                flagged += record["potential_issues_found"] > 0
+            checked += len(records)
+            out.flush()
+
+            if checked - last_report >= PROGRESS_EVERY:
+                last_report = checked
+                rate = checked / (time.perf_counter() - started)
+                print(f"📊 {checked} policies checked ({rate:.0f} policies/sec)")
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Batch report streamed to: {output}")
+    print(f"🔍 {checked} policies against {len(index)} sections in {elapsed:.2f}s "
+          f"({checked / elapsed if elapsed else 0:.0f} policies/sec, {workers} workers)")
+    print(f"⚠️ Policies with potential issues: {flagged}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check a policy against CCR sections")
+    parser.add_argument("--mode", choices=["any", "all"], default="any",
+                        help="flag sections matching any / all policy terms")
+    parser.add_argument("--rebuild-index", action="store_true",
+                        help="rebuild data/inverted_index.json.gz first")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="directory of .txt/.md policies or a JSONL of {id, text}")
+    parser.add_argument("--output", default=str(BATCH_OUTPUT),
+                        help="batch mode: JSONL file, one findings record per policy")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="batch mode: worker processes (default: CPU count)")
+    section_store.add_arguments(parser)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    if args.batch:
+        run_batch(args.batch, args.output, args.mode, args.workers, args.rebuild_index,
+                  args.store)
+    else:
+        sample_policy = """
+        Our organization collects personal data from users and may share
+        information with third-party service providers. Data retention
+        policies apply and disclosures may be required.
+        """
 
-    generate_report(sample_policy)
+        generate_report(sample_policy, args.mode, args.rebuild_index, args.store)
@@ -0,0 +1,126 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, cache_key, text_hash
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+import metrics  # noqa: E402
+
+# --------------------------------------------------
+# Section embedding engine
+#
+# Texts are sorted by length before batching so each batch pads to a
+# similar length, encoded with the MiniLM model (optionally across a pool
+# of CPU worker processes), then put back in input order. The returned
+# float32 vectors go straight into Chroma via embeddings=. With
+# use_cache=True, texts already embedded by this model in any earlier run
+# are served from the on-disk EmbeddingCache instead of being re-encoded.
+# --------------------------------------------------
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_BATCH_SIZE = 32
+
+
+class Embedder:
+    def __init__(self, model_name=MODEL_NAME, batch_size=DEFAULT_BATCH_SIZE,
+                 processes=0, model=None, use_cache=False):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        if model is None:
+            # Deferred so importing this module doesn't pull in torch
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name, device="cpu")
+        self.model = model
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+        self.pool = None
+        if processes > 1:
+            self.pool = self.model.start_multi_process_pool(
+                target_devices=["cpu"] * processes
+            )
+
+        self.cache = EmbeddingCache(self.dimension) if use_cache else None
+
+        self.texts = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+    def _encode_sorted(self, texts):
+        if self.pool is not None:
+            return self.model.encode_multi_process(
+                texts, self.pool, batch_size=self.batch_size
+            )
+
+        batches = [
+            self.model.encode(
+                texts[i:i + self.batch_size],
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+            )
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return np.vstack(batches)
+
+    def _encode(self, texts):
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = self._encode_sorted([texts[i] for i in order])
+
+        result = np.empty((len(texts), self.dimension), dtype=np.float32)
+        result[order] = vectors
+        return result
+
+    def encode(self, texts):
+        """float32 array of shape (len(texts), dimension), in input order."""
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        started = time.perf_counter()
+
+        with metrics.span("embed"):
+            if self.cache is None:
+                result = self._encode(texts)
+            else:
+                keys = [cache_key(self.model_name, text_hash(t)) for t in texts]
+                result, hit = self.cache.lookup(keys)
+
+                missing = np.nonzero(~hit)[0]
+                if len(missing):
+                    vectors = self._encode([texts[i] for i in missing])
+                    result[missing] = vectors
+                    self.cache.store([keys[i] for i in missing], vectors)
+
+                metrics.inc("embedding_cache_total", len(texts) - len(missing), result="hit")
+                metrics.inc("embedding_cache_total", len(missing), result="miss")
+
+        metrics.inc("records_total", len(texts), stage="embed")
+        self.texts += len(texts)
+        self.seconds += time.perf_counter() - started
+        return result
+
+    def rate(self):
+        """Sections embedded per second so far."""
+        return self.texts / self.seconds if self.seconds else 0.0
+
+    def report(self):
+        report = (f"⚡ Embedded {self.texts} sections in {self.seconds:.1f}s "
+                  f"({self.rate():.1f} sections/sec, batch size {self.batch_size}"
+                  f"{', multi-process' if self.pool is not None else ''})")
+        if self.cache is not None:
+            report += "\n" + self.cache.stats()
+        return report
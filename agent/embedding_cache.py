@@ -0,0 +1,178 @@
+import hashlib
+import json
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writing process at a time
+    fcntl = None
+
+# --------------------------------------------------
+# Persistent embedding cache
+#
+# Vectors live in a memory-mapped float32 matrix with one row per slot;
+# a parallel memory-mapped index holds each slot's 16-byte key
+# (blake2b of model name + content hash) and a last-used tick. The cache
+# has a fixed number of slots derived from max_bytes; when it is full the
+# least recently used rows are overwritten.
+#
+# The indexer and advisor_server.py share the files, each with its own
+# in-memory key -> slot map, so a slot may be reused by another process
+# under a key this one still remembers. Opening (which may start the
+# files over), store and flush hold an exclusive flock on keys.idx, a
+# slot's key is cleared before its vector is overwritten, and every hit
+# re-reads the stored key before and after copying the row: a mismatch
+# is a miss.
+# --------------------------------------------------
+
+CACHE_DIR = Path("data/embedding_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+INDEX_DTYPE = np.dtype([("key", "V16"), ("tick", "<u8")])
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(model_name, content_hash):
+    return hashlib.blake2b(
+        f"{model_name}\0{content_hash}".encode("utf-8"), digest_size=16
+    ).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, dimension, root=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.meta_path = self.root / "cache.json"
+        self.dimension = dimension
+
+        self.capacity = max(1, max_bytes // (dimension * 4 + INDEX_DTYPE.itemsize))
+
+        # Opened (and created) first: deciding to start over and truncating
+        # must not race another process that is mapping the same files
+        self._lock_file = open(self.root / "keys.idx", "ab")
+        with self._locked():
+            meta = {}
+            if self.meta_path.exists():
+                meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+
+            # A different shape means a different model family: start over
+            fresh = meta.get("dimension") != dimension or meta.get("capacity") != self.capacity
+            mode = "w+" if fresh else "r+"
+
+            self.tick = 0 if fresh else meta.get("tick", 0)
+            self.vectors = np.memmap(
+                self.root / "vectors.f32", dtype=np.float32, mode=mode,
+                shape=(self.capacity, dimension),
+            )
+            self.index = np.memmap(
+                self.root / "keys.idx", dtype=INDEX_DTYPE, mode=mode, shape=(self.capacity,),
+            )
+            if fresh:
+                self._flush()
+
+        used = np.nonzero(self.index["tick"])[0]
+        self.slots = {bytes(self.index["key"][i]): int(i) for i in used}
+        self.free = [int(i) for i in np.nonzero(self.index["tick"] == 0)[0][::-1]]
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._lock_file.closed:
+            return
+        self.flush()
+        self._lock_file.close()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across processes sharing the cache directory."""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _holds(self, slot, key):
+        return bytes(self.index["key"][slot]) == key
+
+    def lookup(self, keys):
+        """Array of cached vectors (rows for misses are undefined) + hit mask."""
+        self.tick += 1
+        hit = np.zeros(len(keys), dtype=bool)
+        rows = np.empty((len(keys), self.dimension), dtype=np.float32)
+
+        for i, key in enumerate(keys):
+            slot = self.slots.get(key)
+            if slot is None:
+                continue
+            # Another process may have reused the slot (or be rewriting it)
+            if self._holds(slot, key):
+                rows[i] = self.vectors[slot]
+                if self._holds(slot, key):
+                    self.index["tick"][slot] = self.tick
+                    hit[i] = True
+                    continue
+            self.slots.pop(key, None)
+
+        self.hits += int(hit.sum())
+        self.misses += len(keys) - int(hit.sum())
+        return rows, hit
+
+    def _take_slots(self, n):
+        if len(self.free) < n:
+            # Evict the least recently used rows
+            needed = n - len(self.free)
+            used = np.fromiter(self.slots.values(), dtype=np.int64)
+            oldest = np.argpartition(self.index["tick"][used], needed - 1)[:needed]
+            for slot in used[oldest]:
+                self.slots.pop(bytes(self.index["key"][slot]), None)
+                self.free.append(int(slot))
+        return [self.free.pop() for _ in range(n)]
+
+    def store(self, keys, vectors):
+        self.tick += 1
+        new = {key: vec for key, vec in zip(keys, vectors) if key not in self.slots}
+        new = list(new.items())[-self.capacity:]
+
+        with self._locked():
+            for (key, vec), slot in zip(new, self._take_slots(len(new))):
+                # Readers must never see the old key over the new vector
+                self.index["key"][slot] = bytes(16)
+                self.vectors[slot] = vec
+                self.index[slot] = (key, self.tick)
+                self.slots[key] = slot
+
+    def _flush(self):
+        self.vectors.flush()
+        self.index.flush()
+        self.meta_path.write_text(json.dumps({
+            "dimension": self.dimension,
+            "capacity": self.capacity,
+            "tick": self.tick,
+        }), encoding="utf-8")
+
+    def flush(self):
+        with self._locked():
+            self._flush()
+
+    def stats(self):
+        return (f"🗄️ Embedding cache: {self.hits} hits, {self.misses} misses, "
+                f"{len(self.slots)}/{self.capacity} slots used")
@@ -1,6 +1,32 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
-from datetime import datetime
+import time
+
+# Measured for --profile-startup
+IMPORT_STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import urllib.error  # noqa: E402
+import urllib.request  # noqa: E402
+from datetime import datetime  # noqa: E402
+from functools import lru_cache  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from embedder import Embedder  # noqa: E402
+from facility_rules import FACILITY_RULES  # noqa: E402
+from hybrid_search import HybridRetriever, load_bm25  # noqa: E402
+from relevance import facility_flag, has_features, score_sections  # noqa: E402
+from vector_backends import BACKENDS, DEFAULT_BACKEND, open_collection  # noqa: E402
+from vector_store import hierarchy_tree  # noqa: E402
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+import metrics  # noqa: E402
+from citation_graph import load_graph  # noqa: E402
 
 # --------------------------------------------------
 # Disclaimer (PDF explicitly requires this)
@@ -12,97 +38,18 @@ DISCLAIMER = (
     "or compliance professional for official guidance.\n"
 )
 
-# --------------------------------------------------
-# Facility rules & intent (engineering reasoning)
-# --------------------------------------------------
-
-FACILITY_RULES = {
-    "restaurant": {
-        "allowed_titles": [
-            "Public Health",
-            "Food",
-            "Agriculture",
-            "Alcoholic Beverage",
-            "Labor",
-            "Occupational Safety",
-            "Health"
-        ],
-        "keywords": [
-            "food", "restaurant", "sanitation", "hygiene", "kitchen",
-            "employee", "health", "permit", "alcohol", "beverage",
-            "refrigeration", "inspection"
-        ],
-        "follow_up_questions": [
-            "Do you prepare food on-site?",
-            "Do you serve alcohol?",
-            "How many employees work at the facility?",
-            "Is food stored or refrigerated on the premises?"
-        ]
-    },
-    "farm": {
-        "allowed_titles": [
-            "Food",
-            "Agriculture",
-            "Environmental Protection",
-            "Labor",
-            "Pesticide"
-        ],
-        "keywords": [
-            "farm", "agriculture", "pesticide",
-            "fertilizer", "livestock", "worker", "environment"
-        ],
-        "follow_up_questions": [
-            "Do you use pesticides or fertilizers?",
-            "Do you employ seasonal or migrant workers?",
-            "Do you raise livestock?"
-        ]
-    },
-    "movie theater": {
-        "allowed_titles": [
-            "Public Safety",
-            "Fire",
-            "Building Standards",
-            "Labor"
-        ],
-        "keywords": [
-            "theater", "public assembly", "fire safety",
-            "occupancy", "emergency", "employee"
-        ],
-        "follow_up_questions": [
-            "What is the seating capacity?",
-            "Do you sell food or beverages?",
-            "Do you employ security staff?"
-        ]
-    }
-}
-
 # --------------------------------------------------
 # Relevance scoring (THIS is the key fix)
 # --------------------------------------------------
 
 def relevance_score(section, facility_type):
-    rules = FACILITY_RULES[facility_type]
-
-    title = (section.get("title_name") or "").lower()
-    content = (section.get("content_markdown") or "").lower()
-
-    score = 0
-
-    # Strong signal: correct regulatory domain
-    for allowed in rules["allowed_titles"]:
-        if allowed.lower() in title:
-            score += 3
-
-    # Medium signal: operational keywords
-    for kw in rules["keywords"]:
-        if kw in content:
-            score += 2
-
-    # Penalize clearly irrelevant domains
-    if any(bad in title for bad in ["investment", "finance", "securities"]):
-        score -= 3
-
-    return score
+    """
+    +3 per allowed title term in title_name (strong signal: correct
+    regulatory domain), +2 per facility keyword in the content (medium
+    signal: operational keywords), -3 for clearly irrelevant domains.
+    Uses the index-time bitmasks when the section carries them.
+    """
+    return int(score_sections([section], facility_type)[0])
 
 # --------------------------------------------------
 # Human-readable explanation (mentor-facing)
@@ -119,16 +66,349 @@ def explain_relevance(section, facility_type):
     )
 
 # --------------------------------------------------
-# Main RAG agent
+# Retrieval + rendering (shared by the CLI and advisor_server.py)
 # --------------------------------------------------
 
-def main():
-    # Load vector database
-    client = chromadb.PersistentClient(path="data/chroma_db")
-    collection = client.get_collection("ccr_sections")
+MAX_SHOWN = 5
+MAX_RELATED = 5
+
+# Adaptive retrieval: start at a few times what we show and double k
+# until MAX_SHOWN relevant sections survive (or the index runs out)
+INITIAL_K = MAX_SHOWN * 2
+MAX_K = 400
+
+ADVISOR_URL = os.environ.get("CCR_ADVISOR_URL", "http://127.0.0.1:8765")
+CLIENT_TIMEOUT = 30
+HEALTH_TIMEOUT = 0.5
+
+def load_collection(backend=DEFAULT_BACKEND):
+    return open_collection(backend)
+
+def resolve_scope(scope):
+    """
+    (start, end) preorder range of a CCR subtree such as "Title 17
+    Division 1"; ValueError if there is no tree or no such node.
+    """
+    tree = hierarchy_tree()
+    if tree is None:
+        raise ValueError("no CCR hierarchy; run crawler/build_ccr_hierarchy.py first")
+    node = tree.find(scope)
+    if node is None:
+        raise ValueError(f"unknown CCR scope: {scope!r}")
+    return node, tree.end[node]
+
+@lru_cache(maxsize=1)
+def citation_graph():
+    """data/citation_graph.bin (crawler/citation_graph.py), or None."""
+    return load_graph()
+
+def expand_related(sections):
+    """
+    Add each section's cross-references from the citation graph: CSR
+    neighbour slices, no second semantic query.
+    """
+    graph = citation_graph()
+    if graph is None:
+        return
+    for section in sections:
+        section["cites"] = graph.cites(section["citation"])[:MAX_RELATED]
+        section["cited_by"] = graph.cited_by(section["citation"])[:MAX_RELATED]
+
+def retrieval_filter(facility_type, division=None, scope=None):
+    """Chroma `where` clause: the facility's relevance flag (+ division / subtree)."""
+    clauses = [{facility_flag(facility_type): True}]
+    if division:
+        clauses.append({"division": division})
+    if scope:
+        # A subtree is a contiguous hier_pos range
+        start, end = resolve_scope(scope)
+        clauses += [{"hier_pos": {"$gte": start}}, {"hier_pos": {"$lt": end}}]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def score_results(collection, facility_type, ids, metadatas):
+    # Sections indexed before the current rules need their text
+    documents = None
+    stale = [doc_id for doc_id, m in zip(ids, metadatas) if not has_features(m)]
+    if stale:
+        fetched = collection.get(ids=stale, include=["documents"])
+        by_id = dict(zip(fetched["ids"], fetched["documents"]))
+        documents = [by_id.get(doc_id) for doc_id in ids]
+
+    return score_sections(metadatas, facility_type, documents)
+
+def retrieve(facility_type, collection, query_embedding, where=None,
+             k=INITIAL_K, max_k=MAX_K):
+    """
+    Nearest sections under `where`, doubling k until MAX_SHOWN of them
+    score as relevant. Returns (metadatas, scores, k used).
+    """
+    max_k = min(max_k, collection.count())
+    k = max(1, min(k, max_k))
+
+    while True:
+        # Metadata only: scores come from the index-time feature masks
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=k,
+            where=where,
+            include=["metadatas"]
+        )
+        ids = results["ids"][0]
+        metadatas = results["metadatas"][0]
+        scores = score_results(collection, facility_type, ids, metadatas)
+
+        exhausted = len(ids) < k or k >= max_k
+        if exhausted or int((scores > 0).sum()) >= MAX_SHOWN:
+            return metadatas, scores, k
+        k = min(k * 2, max_k)
+
+def retrieve_hybrid(facility_type, collection, query_embedding, retriever, where=None):
+    """BM25 + dense candidates in rank-fused order (see hybrid_search.py)."""
+    ids, metadatas, timings = retriever.retrieve(facility_type, query_embedding, where)
+    return metadatas, score_results(collection, facility_type, ids, metadatas), timings
+
+def advise(facility_type, collection, query_embedding, division=None, retriever=None,
+           scope=None, expand=False):
+    """
+    Retrieve, score and explain sections; returns a JSON-ready dict.
+    With a HybridRetriever, candidates come from BM25 + dense rank fusion.
+    `scope` restricts the search to one CCR subtree ("Title 17 Division 1");
+    `expand` lists the sections each result cites and is cited by.
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    def search(where):
+        if retriever is None:
+            metadatas, scores, _ = retrieve(facility_type, collection, query_embedding, where)
+            return metadatas, scores
+        metadatas, scores, stages = retrieve_hybrid(
+            facility_type, collection, query_embedding, retriever, where
+        )
+        timings.update(stages)
+        for stage, ms in stages.items():
+            metrics.observe("query_stage_seconds", ms / 1000, stage=stage.removesuffix("_ms"))
+        return metadatas, scores
+
+    with metrics.span("query", facility=facility_type):
+        # Only sections flagged relevant for this facility are searched
+        metadatas, scores = search(retrieval_filter(facility_type, division, scope))
+
+        if not metadatas and not division and not scope:
+            # Index built before the facility flags existed: search unfiltered
+            metadatas, scores = search(None)
+
+        # Sort by relevance score (stable: ties keep similarity order)
+        order = [i for i in np.argsort(-scores, kind="stable") if scores[i] > 0]
+
+        sections = [
+            {
+                "citation": metadatas[i].get("citation") or "CCR § (see source)",
+                "breadcrumb_path": metadatas[i].get("breadcrumb_path") or "CCR hierarchy unavailable",
+                "why_it_applies": explain_relevance(metadatas[i], facility_type),
+                "source_url": metadatas[i].get("source_url") or "Source unavailable",
+                "score": int(scores[i]),
+            }
+            for i in order[:MAX_SHOWN]
+        ]
+
+        if expand:
+            expand_started = time.perf_counter()
+            expand_related(sections)
+            timings["expand_ms"] = round((time.perf_counter() - expand_started) * 1000, 2)
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    return {
+        "facility_type": facility_type,
+        "division": division,
+        "scope": scope,
+        "sections": sections,
+        "follow_up_questions": FACILITY_RULES[facility_type]["follow_up_questions"],
+        "disclaimer": DISCLAIMER,
+        "timings": timings,
+    }
+
+def render(result):
+    """The advisor's CLI text for an advise() result."""
+    lines = [f"\n📋 Applicable CCR Sections for {result['facility_type'].capitalize()}:\n"]
 
-    # Load embedding model
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    for section in result["sections"]:
+        lines.append(f"📘 {section['citation']}")
+        lines.append(f"🧭 Path: {section['breadcrumb_path']}")
+        lines.append(f"🧠 Why it applies: {section['why_it_applies']}")
+        if section.get("cites"):
+            lines.append(f"➡️ Cites: {', '.join(section['cites'])}")
+        if section.get("cited_by"):
+            lines.append(f"⬅️ Cited by: {', '.join(section['cited_by'])}")
+        lines.append(f"🔗 Source: {section['source_url']}\n")
+
+    if not result["sections"]:
+        lines.append("⚠️ No strongly relevant sections found with current information.\n")
+
+    # Follow-up questions (PDF requirement)
+    lines.append("❓ Follow-up questions to refine compliance guidance:")
+    for q in result["follow_up_questions"]:
+        lines.append(f"  - {q}")
+
+    lines.append(result["disclaimer"])
+    return "\n".join(lines)
+
+def request_advice(facility_type, url=ADVISOR_URL, division=None, scope=None, expand=False):
+    """Ask a running advisor_server.py; None if none is reachable."""
+    payload = {"facility_type": facility_type}
+    if division:
+        payload["division"] = division
+    if scope:
+        payload["scope"] = scope
+    if expand:
+        payload["expand"] = True
+    request = urllib.request.Request(
+        f"{url}/advise",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=CLIENT_TIMEOUT) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except (urllib.error.URLError, OSError):
+        return None
+
+def server_available(url=ADVISOR_URL):
+    try:
+        with urllib.request.urlopen(f"{url}/health", timeout=HEALTH_TIMEOUT):
+            return True
+    except (urllib.error.URLError, OSError):
+        return False
+
+class Warmup(threading.Thread):
+    """
+    Loads the collection and the embedding model (torch included) on a
+    background thread and embeds every supported facility, so the work
+    overlaps with the user typing at the prompt.
+    """
+
+    def __init__(self, backend=DEFAULT_BACKEND, hybrid=False):
+        super().__init__(name="advisor-warmup", daemon=True)
+        self.backend = backend
+        self.hybrid = hybrid
+        self.collection = None
+        self.embedder = None
+        self.retriever = None
+        self.embeddings = {}
+        self.timings = {}
+        self.waited = None
+        self.error = None
+        self.start()
+
+    def _timed(self, stage, func):
+        started = time.perf_counter()
+        value = func()
+        self.timings[stage] = time.perf_counter() - started
+        return value
+
+    def run(self):
+        try:
+            self.collection = self._timed("collection load", lambda: load_collection(self.backend))
+
+            # Facility strings are served from the disk cache after the first run
+            self.embedder = self._timed("model load", lambda: Embedder(use_cache=True))
+            if self.hybrid:
+                self.retriever = self._timed(
+                    "bm25 load", lambda: HybridRetriever(self.collection, load_bm25())
+                )
+
+            # Embed queries (intentionally broad)
+            facilities = list(FACILITY_RULES)
+            vectors = self._timed("facility embeddings", lambda: self.embedder.encode(facilities))
+            self.embeddings = {f: v.tolist() for f, v in zip(facilities, vectors)}
+        except Exception as e:
+            self.error = e
+
+    def ready(self):
+        """Wait for the warm-up; returns self or re-raises its error."""
+        started = time.perf_counter()
+        self.join()
+        self.waited = time.perf_counter() - started
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def close(self):
+        if self.embedder is not None:
+            self.embedder.close()
+        if self.retriever is not None:
+            self.retriever.close()
+
+def advise_locally(facility_type, division=None, hybrid=False, backend=DEFAULT_BACKEND,
+                   warmup=None, scope=None, expand=False):
+    warmup = (warmup or Warmup(backend, hybrid)).ready()
+    try:
+        return advise(facility_type, warmup.collection, warmup.embeddings[facility_type],
+                      division, warmup.retriever, scope, expand)
+    finally:
+        warmup.close()
+
+def format_timings(timings):
+    return "⏱️ " + ", ".join(f"{stage} {ms} ms" for stage, ms in timings.items())
+
+def print_startup_profile(startup, warmup):
+    print("\n🚦 Startup profile:")
+    for stage, seconds in startup.items():
+        print(f"  {stage:<22} {seconds * 1000:8.1f} ms")
+    if warmup is not None:
+        for stage, seconds in warmup.timings.items():
+            print(f"  {stage:<22} {seconds * 1000:8.1f} ms  (background)")
+        if warmup.waited is not None:
+            print(f"  {'waited after input':<22} {warmup.waited * 1000:8.1f} ms")
+
+# --------------------------------------------------
+# Main RAG agent (thin client)
+# --------------------------------------------------
+
+def main():
+    main_started = time.perf_counter()
+
+    parser = argparse.ArgumentParser(description="CCR compliance advisor")
+    parser.add_argument("--local", action="store_true",
+                        help="answer in-process instead of asking advisor_server.py")
+    parser.add_argument("--server", default=ADVISOR_URL,
+                        help="advisor service URL")
+    parser.add_argument("--division", default=None,
+                        help="only consider sections in this CCR division")
+    parser.add_argument("--scope", default=None,
+                        help='only search one CCR subtree, e.g. "Title 17 Division 1"')
+    parser.add_argument("--expand", action="store_true",
+                        help="list the sections each result cites / is cited by")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="fuse BM25 and vector retrieval (implies --local)")
+    parser.add_argument("--timings", action="store_true",
+                        help="print per-stage retrieval latency")
+    parser.add_argument("--backend", choices=BACKENDS, default=None,
+                        help=f"vector store to query (default {DEFAULT_BACKEND}; implies --local)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report import, prompt and model/index load timings")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    if args.scope:
+        try:
+            resolve_scope(args.scope)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # The server retrieves with its own --hybrid / --backend, so asking for
+    # either here only makes sense in-process
+    args.local = args.local or args.hybrid or args.backend is not None
+    args.backend = args.backend or DEFAULT_BACKEND
+
+    # Start loading the model and index now, unless a warm server will answer
+    warmup = None
+    if args.local or not server_available(args.server):
+        warmup = Warmup(args.backend, args.hybrid)
+
+    startup = {"imports": main_started - IMPORT_STARTED,
+               "time to prompt": time.perf_counter() - IMPORT_STARTED}
 
     # Input validation loop
     facility_type = ""
@@ -140,60 +420,20 @@ def main():
         if facility_type not in FACILITY_RULES:
             print("❌ Invalid input. Please choose a supported facility type.\n")
 
-    # Embed query (intentionally broad)
-    query_embedding = model.encode(facility_type).tolist()
-
-    # Retrieve candidate sections
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=25
-    )
-
-    print(f"\n📋 Applicable CCR Sections for {facility_type.capitalize()}:\n")
-
-    scored_sections = []
-
-    for metadata, document in zip(
-        results["metadatas"][0],
-        results["documents"][0]
-    ):
-        section = {
-            **metadata,
-            "content_markdown": document
-        }
-
-        score = relevance_score(section, facility_type)
-        if score > 0:
-            scored_sections.append((score, section))
-
-    # Sort by relevance score
-    scored_sections.sort(key=lambda x: x[0], reverse=True)
-
-    shown = 0
-
-    for _, section in scored_sections:
-        citation = section.get("citation") or "CCR § (see source)"
-        breadcrumb = section.get("breadcrumb_path") or "CCR hierarchy unavailable"
-        source = section.get("source_url") or "Source unavailable"
-
-        print(f"📘 {citation}")
-        print(f"🧭 Path: {breadcrumb}")
-        print(f"🧠 Why it applies: {explain_relevance(section, facility_type)}")
-        print(f"🔗 Source: {source}\n")
-
-        shown += 1
-        if shown >= 5:
-            break
-
-    if shown == 0:
-        print("⚠️ No strongly relevant sections found with current information.\n")
-
-    # Follow-up questions (PDF requirement)
-    print("❓ Follow-up questions to refine compliance guidance:")
-    for q in FACILITY_RULES[facility_type]["follow_up_questions"]:
-        print(f"  - {q}")
-
-    print(DISCLAIMER)
+    result = None
+    if warmup is None:
+        result = request_advice(facility_type, args.server, args.division, args.scope,
+                                args.expand)
+    if result is None:
+        # No service running: answer in this process from the warmed-up model and index
+        result = advise_locally(facility_type, args.division, args.hybrid, args.backend, warmup,
+                                args.scope, args.expand)
+
+    print(render(result))
+    if args.timings and result.get("timings"):
+        print(format_timings(result["timings"]))
+    if args.profile_startup:
+        print_startup_profile(startup, warmup)
 
 # --------------------------------------------------
 # Entrypoint
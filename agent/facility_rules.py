@@ -0,0 +1,66 @@
+# --------------------------------------------------
+# Facility rules & intent (engineering reasoning)
+# --------------------------------------------------
+
+FACILITY_RULES = {
+    "restaurant": {
+        "allowed_titles": [
+            "Public Health",
+            "Food",
+            "Agriculture",
+            "Alcoholic Beverage",
+            "Labor",
+            "Occupational Safety",
+            "Health"
+        ],
+        "keywords": [
+            "food", "restaurant", "sanitation", "hygiene", "kitchen",
+            "employee", "health", "permit", "alcohol", "beverage",
+            "refrigeration", "inspection"
+        ],
+        "follow_up_questions": [
+            "Do you prepare food on-site?",
+            "Do you serve alcohol?",
+            "How many employees work at the facility?",
+            "Is food stored or refrigerated on the premises?"
+        ]
+    },
+    "farm": {
+        "allowed_titles": [
+            "Food",
+            "Agriculture",
+            "Environmental Protection",
+            "Labor",
+            "Pesticide"
+        ],
+        "keywords": [
+            "farm", "agriculture", "pesticide",
+            "fertilizer", "livestock", "worker", "environment"
+        ],
+        "follow_up_questions": [
+            "Do you use pesticides or fertilizers?",
+            "Do you employ seasonal or migrant workers?",
+            "Do you raise livestock?"
+        ]
+    },
+    "movie theater": {
+        "allowed_titles": [
+            "Public Safety",
+            "Fire",
+            "Building Standards",
+            "Labor"
+        ],
+        "keywords": [
+            "theater", "public assembly", "fire safety",
+            "occupancy", "emergency", "employee"
+        ],
+        "follow_up_questions": [
+            "What is the seating capacity?",
+            "Do you sell food or beverages?",
+            "Do you employ security staff?"
+        ]
+    }
+}
+
+# Regulatory domains that count against a section regardless of facility
+PENALTY_TITLES = ["investment", "finance", "securities"]
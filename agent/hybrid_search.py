@@ -0,0 +1,171 @@
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from facility_rules import FACILITY_RULES
+from inverted_index import load_or_build, tokenize
+from vector_store import DATA_FILE, section_id
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+from section_extractor import record_body  # noqa: E402
+
+# --------------------------------------------------
+# Hybrid lexical + dense retrieval
+#
+# BM25 runs over an InvertedIndex of ccr_sections_enriched.jsonl whose
+# entries carry the same section ids as the Chroma collection. The BM25
+# query is the facility plus its rule keywords; the dense query is the
+# facility embedding. Both run concurrently and are merged with
+# reciprocal rank fusion: score(id) = sum 1 / (RRF_K + rank).
+# --------------------------------------------------
+
+BM25_INDEX_FILE = Path("data/bm25_index.json.gz")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+# Lexical hits are nearly free, so the dense stage can stay small
+DENSE_K = 10
+LEXICAL_K = 50
+
+
+def enriched_entry(record):
+    return {
+        "id": section_id(record),
+        "url": record.get("source_url"),
+        "citation": record.get("citation"),
+    }
+
+
+def enriched_text(record):
+    return " ".join((
+        record.get("section_name") or "",
+        record.get("breadcrumb_path") or "",
+        record_body(record),
+    ))
+
+
+class BM25:
+    def __init__(self, index, k1=BM25_K1, b=BM25_B):
+        self.index = index
+        self.k1 = k1
+        self.b = b
+
+        lengths = np.asarray(index.lengths, dtype=np.float32)
+        avg = float(lengths.mean()) if len(lengths) else 1.0
+        self.norm = k1 * (1 - b + b * lengths / (avg or 1.0))
+        self.terms = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _term(self, token):
+        """(section ids, per-section BM25 weight) for one token, memoized."""
+        cached = self.terms.get(token)
+        if cached is None:
+            postings = self.index.postings.get(token, ())
+            docs = np.fromiter((d for d, _ in postings), dtype=np.int64, count=len(postings))
+            tf = np.fromiter((len(p) for _, p in postings), dtype=np.float32, count=len(postings))
+
+            n = len(self.index)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            cached = (docs, idf * tf * (self.k1 + 1) / (tf + self.norm[docs]))
+            self.terms[token] = cached
+        return cached
+
+    def search(self, text, k=LEXICAL_K):
+        """[(section id, score)] best first."""
+        scores = np.zeros(len(self.index), dtype=np.float32)
+        for token in set(tokenize(text)):
+            docs, weights = self._term(token)
+            scores[docs] += weights
+
+        hits = np.nonzero(scores)[0]
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [(self.index.sections[i]["id"], float(scores[i])) for i in top]
+
+
+def load_bm25(rebuild=False):
+    index = load_or_build(DATA_FILE, BM25_INDEX_FILE, rebuild,
+                          entry=enriched_entry, text=enriched_text)
+    return BM25(index)
+
+
+def lexical_query(facility_type):
+    return " ".join([facility_type, *FACILITY_RULES[facility_type]["keywords"]])
+
+
+def rrf(*rankings, k=RRF_K):
+    """Ids ordered by reciprocal rank fusion of several ranked id lists."""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
+
+
+class HybridRetriever:
+    def __init__(self, collection, bm25, dense_k=DENSE_K, lexical_k=LEXICAL_K):
+        self.collection = collection
+        self.bm25 = bm25
+        self.dense_k = dense_k
+        self.lexical_k = lexical_k
+        self.pool = ThreadPoolExecutor(max_workers=2)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def _dense(self, query_embedding, where):
+        started = time.perf_counter()
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=self.dense_k,
+            where=where,
+            include=["metadatas"]
+        )
+        ids, metadatas = results["ids"][0], results["metadatas"][0]
+        return dict(zip(ids, metadatas)), ids, time.perf_counter() - started
+
+    def _lexical(self, facility_type):
+        started = time.perf_counter()
+        hits = self.bm25.search(lexical_query(facility_type), self.lexical_k)
+        return [doc_id for doc_id, _ in hits], time.perf_counter() - started
+
+    def retrieve(self, facility_type, query_embedding, where=None):
+        """
+        (ids, metadatas, timings) in fused order. Lexical-only hits are
+        checked against `where` when their metadata is fetched.
+        """
+        started = time.perf_counter()
+        dense = self.pool.submit(self._dense, query_embedding, where)
+        lexical = self.pool.submit(self._lexical, facility_type)
+
+        metadata_by_id, dense_ids, dense_s = dense.result()
+        lexical_ids, lexical_s = lexical.result()
+
+        fuse_started = time.perf_counter()
+        missing = [doc_id for doc_id in lexical_ids if doc_id not in metadata_by_id]
+        if missing:
+            fetched = self.collection.get(ids=missing, where=where, include=["metadatas"])
+            metadata_by_id.update(zip(fetched["ids"], fetched["metadatas"]))
+
+        ids = [doc_id for doc_id in rrf(dense_ids, lexical_ids) if doc_id in metadata_by_id]
+        fused_s = time.perf_counter() - fuse_started
+
+        timings = {
+            "dense_ms": round(dense_s * 1000, 2),
+            "lexical_ms": round(lexical_s * 1000, 2),
+            "fusion_ms": round(fused_s * 1000, 2),
+            "retrieval_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        return ids, [metadata_by_id[i] for i in ids], timings
+
+
+if __name__ == "__main__":
+    load_bm25(rebuild=True)
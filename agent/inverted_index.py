@@ -0,0 +1,181 @@
+import gzip
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+from blob_store import resolve  # noqa: E402
+from section_extractor import extract  # noqa: E402
+
+# --------------------------------------------------
+# Persisted inverted index over section text
+#
+# token -> posting list [[section_id, [positions...]], ...], sorted by
+# section id. Section ids index into `sections` (url + title). Tokens
+# are lowercase alphanumeric runs, so "process" no longer matches inside
+# "processing". Only the regulation body is indexed, not the page's
+# navigation and footer. The index is gzip JSON next to the data and is
+# rebuilt when the source file's size or mtime changes.
+# --------------------------------------------------
+
+SECTIONS_FILE = Path("data/sections_content.jsonl")
+INDEX_FILE = Path("data/inverted_index.json.gz")
+INDEX_VERSION = 2
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def section_text(record):
+    """Regulation body: the record's own when cleaned, else extracted from the page."""
+    if record.get("body") is not None:
+        return record["body"]
+    return extract(record.get("content") or resolve(record, "markdown"))["body"]
+
+
+def section_entry(record):
+    return {
+        "url": record.get("url"),
+        "section_title": record.get("section_title", "Unknown Section"),
+    }
+
+
+def source_signature(path):
+    stat = Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class InvertedIndex:
+    def __init__(self, sections, postings, lengths, source=None):
+        self.sections = sections
+        self.postings = postings
+        self.lengths = lengths
+        self.source = source
+
+    def __len__(self):
+        return len(self.sections)
+
+    def entry(self, doc):
+        return self.sections[doc]
+
+    # ---------- build / persist ----------
+
+    @classmethod
+    def build(cls, sections_file=SECTIONS_FILE, entry=section_entry, text=section_text):
+        """entry(record) -> what sections[i] stores; text(record) -> indexed text."""
+        sections = []
+        postings = {}
+        lengths = []
+
+        with open(sections_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                doc = len(sections)
+                sections.append(entry(record))
+
+                positions = {}
+                tokens = tokenize(text(record))
+                for pos, token in enumerate(tokens):
+                    positions.setdefault(token, []).append(pos)
+                lengths.append(len(tokens))
+
+                for token, where in positions.items():
+                    postings.setdefault(token, []).append([doc, where])
+
+        return cls(sections, postings, lengths, source_signature(sections_file))
+
+    def save(self, path=INDEX_FILE):
+        payload = {
+            "version": INDEX_VERSION,
+            "source": self.source,
+            "sections": self.sections,
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+        tmp = Path(f"{path}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != INDEX_VERSION:
+            raise ValueError(f"{path}: index version {payload.get('version')}")
+        return cls(payload["sections"], payload["postings"],
+                   payload["lengths"], payload.get("source"))
+
+    # ---------- queries ----------
+
+    def docs(self, token):
+        """Sorted section ids containing token."""
+        return [doc for doc, _ in self.postings.get(token, ())]
+
+    def positions(self, token, doc):
+        for posting_doc, where in self.postings.get(token, ()):
+            if posting_doc == doc:
+                return where
+        return []
+
+    def search(self, terms, mode="any"):
+        """
+        {section_id: [matched terms, in the order given]}.
+        mode="all" keeps only sections containing every term.
+        """
+        terms = list(dict.fromkeys(terms))
+        if not terms:
+            return {}
+
+        if mode == "all":
+            # Intersect from the shortest posting list up
+            ordered = sorted(terms, key=lambda t: len(self.postings.get(t, ())))
+            hits = set(self.docs(ordered[0]))
+            for term in ordered[1:]:
+                if not hits:
+                    break
+                hits.intersection_update(self.docs(term))
+            return {doc: list(terms) for doc in sorted(hits)}
+
+        if mode != "any":
+            raise ValueError(f"unknown match mode: {mode}")
+
+        matches = {}
+        for term in terms:
+            for doc in self.docs(term):
+                matches.setdefault(doc, []).append(term)
+        return dict(sorted(matches.items()))
+
+
+def load_or_build(sections_file=SECTIONS_FILE, path=INDEX_FILE, rebuild=False,
+                  entry=section_entry, text=section_text):
+    """The persisted index, rebuilt first if missing or stale."""
+    path = Path(path)
+    if path.exists() and not rebuild:
+        try:
+            index = InvertedIndex.load(path)
+            if index.source == source_signature(sections_file):
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+
+    started = time.perf_counter()
+    index = InvertedIndex.build(sections_file, entry, text)
+    index.save(path)
+    print(f"🗂️ Indexed {len(index)} sections ({len(index.postings)} tokens) "
+          f"in {time.perf_counter() - started:.2f}s → {path}")
+    return index
+
+
+if __name__ == "__main__":
+    load_or_build(rebuild=True)
@@ -0,0 +1,224 @@
+"""
+Single-pass pipeline: crawled pages → clean → enrich → embed → vector store.
+
+Records stream through the stages as generators and are embedded and
+upserted in micro-batches, so memory stays flat regardless of corpus
+size. Upserts run on a writer thread behind a bounded queue: while one
+batch is being written the next is embedded, and when the writer falls
+behind the producer blocks instead of buffering.
+
+    python agent/pipeline.py [--batch-size 64] [--write-clean] [--write-enriched]
+    python agent/pipeline.py --manifest        # only the recrawl delta
+    python agent/pipeline.py --incremental     # skip sections whose hash is unchanged
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+
+from embedder import DEFAULT_BATCH_SIZE, Embedder
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+import metrics  # noqa: E402
+from clean_sections import OUTPUT_FILE as CLEAN_FILE, clean_record, iter_raw  # noqa: E402
+from enrich_sections import OUTPUT_FILE as ENRICHED_FILE, enrich_record  # noqa: E402
+from incremental import MANIFEST_FILE, load_manifest  # noqa: E402
+from vector_backends import BACKENDS, COLLECTION_NAME, DEFAULT_BACKEND, open_collection  # noqa: E402
+from vector_store import build_metadata, existing_hashes, section_id  # noqa: E402
+
+BATCH_SIZE = 64
+MAX_PENDING_BATCHES = 2
+
+
+def tee_jsonl(records, path):
+    """Pass records through unchanged while writing them to path."""
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            yield record
+
+
+def batched(records, size):
+    it = iter(records)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def measured(stage, func, records):
+    """map(func, records) with every call timed as a metrics span."""
+    for record in records:
+        with metrics.span(stage):
+            result = func(record)
+        metrics.inc("records_total", stage=stage)
+        yield result
+
+
+def section_stream(delta=None, write_clean=False, write_enriched=False):
+    records = measured("clean", clean_record, iter_raw(delta))
+    if write_clean:
+        records = tee_jsonl(records, CLEAN_FILE)
+
+    records = measured("enrich", enrich_record, records)
+    if write_enriched:
+        records = tee_jsonl(records, ENRICHED_FILE)
+
+    return records
+
+
+class BatchWriter:
+    """Upserts batches on a background thread; put() blocks when full."""
+
+    def __init__(self, collection, max_pending=MAX_PENDING_BATCHES):
+        self.collection = collection
+        self.batches = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            if self.error is None:
+                try:
+                    with metrics.span("upsert"):
+                        self.collection.upsert(**batch)
+                    metrics.inc("records_total", len(batch["ids"]), stage="upsert")
+                except Exception as e:
+                    self.error = e
+
+    def put(self, batch):
+        if self.error is not None:
+            raise self.error
+        self.batches.put(batch)
+
+    def close(self):
+        self.batches.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def with_ids(records, known=None):
+    """
+    Yield (id, record, metadata). With known ({id: content_hash}), skip
+    sections whose hash already matches and pop every id seen, leaving
+    only ids that vanished from the corpus.
+    """
+    for record in records:
+        doc_id = section_id(record)
+        metadata = build_metadata(record)
+
+        if known is not None:
+            unchanged = known.get(doc_id) == metadata["content_hash"]
+            known.pop(doc_id, None)
+            if unchanged:
+                continue
+
+        yield doc_id, record, metadata
+
+
+def run(collection, embedder, records, batch_size=BATCH_SIZE):
+    writer = BatchWriter(collection)
+    count = 0
+    started = time.monotonic()
+
+    try:
+        for batch in batched(records, batch_size):
+            documents = [r["content_markdown"] for _, r, _ in batch]
+            embeddings = embedder.encode(documents)
+
+            writer.put({
+                "ids": [doc_id for doc_id, _, _ in batch],
+                "embeddings": embeddings.tolist(),
+                "documents": documents,
+                "metadatas": [metadata for _, _, metadata in batch],
+            })
+
+            count += len(batch)
+            elapsed = time.monotonic() - started
+            print(f"  ↳ {count} sections indexed ({count / elapsed:.1f}/s, "
+                  f"embedding {embedder.rate():.1f}/s)")
+    finally:
+        writer.close()
+
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawled pages → queryable index in one pass")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="sections per upsert micro-batch")
+    parser.add_argument("--embed-batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="texts per model forward pass")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="CPU worker processes for embedding (0 = in-process)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass the on-disk embedding cache")
+    parser.add_argument("--write-clean", action="store_true",
+                        help=f"also write {CLEAN_FILE}")
+    parser.add_argument("--write-enriched", action="store_true",
+                        help=f"also write {ENRICHED_FILE}")
+    parser.add_argument("--manifest", nargs="?", const=str(MANIFEST_FILE),
+                        help="only process pages added/changed in a recrawl manifest")
+    parser.add_argument("--incremental", action="store_true",
+                        help="embed only new or changed sections and drop vanished ones")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="drop the collection before indexing")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="vector store: Chroma or the local flat/IVF index")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    if args.manifest and (args.write_clean or args.write_enriched):
+        parser.error("--write-clean/--write-enriched rewrite whole files; "
+                     "use them without --manifest")
+    if args.manifest and args.incremental:
+        parser.error("--manifest and --incremental are alternative delta modes")
+
+    collection = open_collection(args.backend, create=True, rebuild=args.rebuild)
+
+    delta = None
+    if args.manifest:
+        delta, removed = load_manifest(args.manifest)
+        manifest = json.loads(Path(args.manifest).read_text(encoding="utf-8"))
+        stale = list(set(manifest["changed"]) | removed)
+        if stale:
+            collection.delete(where={"source_url": {"$in": stale}})
+        print(f"🧾 Manifest: {len(delta)} sections to index, {len(stale)} stale removed")
+
+    # Ids still in `known` after the stream was never produced again
+    known = existing_hashes(collection) if args.incremental else None
+
+    print("🚚 Streaming sections through clean → enrich → embed → upsert...")
+    with Embedder(batch_size=args.embed_batch_size, processes=args.processes,
+                  use_cache=not args.no_cache) as embedder:
+        count = run(
+            collection,
+            embedder,
+            with_ids(section_stream(delta, args.write_clean, args.write_enriched), known),
+            args.batch_size,
+        )
+        print(embedder.report())
+
+    if known:
+        collection.delete(ids=list(known))
+        print(f"🗑️ Removed {len(known)} sections no longer in the corpus")
+
+    with metrics.span("upsert", phase="flush"):
+        collection.flush()
+    print(f"✅ Indexed {count} CCR sections into '{COLLECTION_NAME}'")
+
+
+if __name__ == "__main__":
+    main()
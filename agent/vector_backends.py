@@ -0,0 +1,646 @@
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+# --------------------------------------------------
+# Pluggable vector store backends
+#
+# Every backend exposes the subset of the Chroma collection API the
+# agent uses -- query / get / upsert / delete / count -- plus flush(),
+# so vector_store.py, pipeline.py and facility_advisor.py run unchanged
+# on any of them:
+#
+#   chroma  chromadb.PersistentClient collection (data/chroma_db)
+#   flat    exact search over memory-mapped float32 vectors stored in
+#           FAISS IndexFlatL2 format (data/ccr_faiss.index) with a JSON
+#           sidecar of ids / documents / metadata (data/ccr_metadata.json)
+#   ivf     flat storage + a k-means inverted file (data/ccr_ivf.npz);
+#           queries scan only the nprobe nearest lists
+#   int8 /  flat storage + int8 or sign-bit codes (data/ccr_quant_*.npz)
+#   binary  searched in RAM; the top candidates are re-ranked exactly
+#           from the float32 memmap
+#
+# Local backends keep writes in memory until flush().
+# --------------------------------------------------
+
+DATA_DIR = Path("data")
+CHROMA_DIR = "chroma_db"
+COLLECTION_NAME = "ccr_sections"
+
+FAISS_INDEX_NAME = "ccr_faiss.index"
+METADATA_NAME = "ccr_metadata.json"
+IVF_NAME = "ccr_ivf.npz"
+
+BACKENDS = ("chroma", "flat", "ivf", "int8", "binary")
+DEFAULT_BACKEND = os.environ.get("CCR_VECTOR_BACKEND", "chroma")
+
+# FAISS IndexFlat header: fourcc, d, ntotal, two unused int64s,
+# is_trained, metric type, then the float count before the raw data
+FAISS_HEADER = struct.Struct("<4siqqq?iQ")
+FAISS_FOURCC = b"IxF2"
+FAISS_METRIC_L2 = 1
+FAISS_UNUSED = 1 << 20
+
+IVF_NPROBE = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+
+# Quantized first stage: candidates re-ranked per result, rows per block
+INT8_RERANK = 4
+BINARY_RERANK = 32
+QUANT_BLOCK = 4096
+SCAN_BLOCK = 4096
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+# ---------- FAISS flat index file ----------
+
+def write_faiss_flat(path, vectors):
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ntotal, d = vectors.shape if vectors.ndim == 2 else (0, 0)
+
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(FAISS_HEADER.pack(FAISS_FOURCC, d, ntotal, FAISS_UNUSED, FAISS_UNUSED,
+                                  True, FAISS_METRIC_L2, ntotal * d))
+        f.write(vectors.tobytes())
+    tmp.replace(path)
+
+
+def read_faiss_flat(path):
+    """Read-only memmap of an IndexFlatL2 file's vectors, shape (ntotal, d)."""
+    with open(path, "rb") as f:
+        header = f.read(FAISS_HEADER.size)
+    fourcc, d, ntotal, _, _, _, metric, count = FAISS_HEADER.unpack(header)
+
+    if fourcc != FAISS_FOURCC or metric != FAISS_METRIC_L2 or count != ntotal * d:
+        raise ValueError(f"{path}: not a FAISS IndexFlatL2 file")
+    if ntotal == 0:
+        return np.empty((0, d), dtype=np.float32)
+
+    return np.memmap(path, dtype=np.float32, mode="r",
+                     offset=FAISS_HEADER.size, shape=(ntotal, d))
+
+
+def _blockwise(vectors, func):
+    """
+    func over aligned copies of row blocks. FAISS puts the data at byte
+    offset 45, so the memmap itself is misaligned and BLAS would take its
+    slow path on it.
+    """
+    out = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), SCAN_BLOCK):
+        block = np.array(vectors[start:start + SCAN_BLOCK], dtype=np.float32)
+        out[start:start + len(block)] = func(block)
+    return out
+
+
+def _smallest(values, k):
+    """Indices of the k smallest values, in ascending order."""
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(values, k - 1)[:k] if k < len(values) else np.arange(len(values))
+    return top[np.argsort(values[top], kind="stable")]
+
+
+# ---------- metadata filters ----------
+
+RANGE_OPS = {"$gt": np.greater, "$gte": np.greater_equal,
+             "$lt": np.less, "$lte": np.less_equal}
+
+def _compare(value, condition):
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for op, operand in condition.items():
+        if op == "$eq":
+            ok = value == operand
+        elif op == "$ne":
+            ok = value != operand
+        elif op == "$in":
+            ok = value in operand
+        elif op == "$nin":
+            ok = value not in operand
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None:
+                return False
+            ok = {"$gt": value > operand, "$gte": value >= operand,
+                  "$lt": value < operand, "$lte": value <= operand}[op]
+        else:
+            raise ValueError(f"unsupported where operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches(metadata, where):
+    """Chroma-style `where` clause evaluated against one metadata dict."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif not _compare(metadata.get(key), condition):
+            return False
+    return True
+
+
+# ---------- Chroma ----------
+
+class ChromaBackend:
+    """Thin pass-through to a chromadb collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    @classmethod
+    def open(cls, root=DATA_DIR, create=False, rebuild=False):
+        import chromadb
+
+        client = chromadb.PersistentClient(path=str(Path(root) / CHROMA_DIR))
+        if rebuild:
+            try:
+                client.delete_collection(COLLECTION_NAME)
+            except Exception:
+                pass
+        if create or rebuild:
+            return cls(client.get_or_create_collection(name=COLLECTION_NAME))
+        return cls(client.get_collection(COLLECTION_NAME))
+
+    def query(self, **kwargs):
+        return self.collection.query(**kwargs)
+
+    def get(self, **kwargs):
+        return self.collection.get(**kwargs)
+
+    def upsert(self, **kwargs):
+        return self.collection.upsert(**kwargs)
+
+    def delete(self, **kwargs):
+        return self.collection.delete(**kwargs)
+
+    def count(self):
+        return self.collection.count()
+
+    def flush(self):
+        pass
+
+
+# ---------- local flat / IVF ----------
+
+class FlatBackend:
+    """Exact L2 search over memory-mapped float32 vectors."""
+
+    def __init__(self, root=DATA_DIR):
+        self.root = Path(root)
+        self.index_path = self.root / FAISS_INDEX_NAME
+        self.metadata_path = self.root / METADATA_NAME
+
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.size = 0
+        self.row = None
+        self.dirty = False
+        self._norms = None
+        self._masks = {}
+        self._columns = {}
+
+    @classmethod
+    def open(cls, root=DATA_DIR, create=False, rebuild=False):
+        backend = cls(root)
+        if rebuild:
+            backend.dirty = True
+        elif backend.index_path.exists():
+            backend._load()
+        elif not create:
+            raise FileNotFoundError(f"{backend.index_path}: no local vector index; "
+                                    "run vector_store.py --backend first")
+        return backend
+
+    def _load(self):
+        self.vectors = read_faiss_flat(self.index_path)
+        self.size = len(self.vectors)
+
+        entries = []
+        if self.metadata_path.exists():
+            entries = json.loads(self.metadata_path.read_text(encoding="utf-8"))
+        if len(entries) != self.size:
+            raise ValueError(f"{self.metadata_path}: {len(entries)} entries for "
+                             f"{self.size} vectors in {self.index_path}")
+
+        for entry in entries:
+            # Older sidecars only recorded the section id / url per row
+            url = entry.get("url")
+            self.ids.append(entry.get("id") or entry.get("section_id") or url)
+            self.documents.append(entry.get("document"))
+            self.metadatas.append(entry.get("metadata") or {"source_url": url or ""})
+
+    def _rows(self):
+        if self.row is None:
+            self.row = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        return self.row
+
+    def _changed(self):
+        self.dirty = True
+        self._norms = None
+        self._masks.clear()
+        self._columns.clear()
+
+    def _reserve(self, extra, dimension):
+        """Make room for `extra` more rows in an in-memory growable buffer."""
+        if self.size == 0 and self.vectors.shape[1] != dimension:
+            self.vectors = np.empty((0, dimension), dtype=np.float32)
+        if self.vectors.shape[1] != dimension:
+            raise ValueError(f"vector dimension {dimension} != index dimension "
+                             f"{self.vectors.shape[1]}")
+
+        # The read-only memmap is copied out on the first write
+        needed = self.size + extra
+        if isinstance(self.vectors, np.memmap) or len(self.vectors) < needed:
+            grown = np.empty((max(needed, 2 * len(self.vectors), 1024), dimension),
+                             dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+
+    # ---------- writes ----------
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        rows = self._rows()
+        new = [i for i, doc_id in enumerate(ids) if doc_id not in rows]
+        self._reserve(len(new), embeddings.shape[1])
+
+        for i, doc_id in enumerate(ids):
+            row = rows.get(doc_id)
+            if row is None:
+                row = self.size
+                rows[doc_id] = row
+                self.ids.append(doc_id)
+                self.documents.append(None)
+                self.metadatas.append({})
+                self.size += 1
+            self.vectors[row] = embeddings[i]
+            if documents is not None:
+                self.documents[row] = documents[i]
+            if metadatas is not None:
+                self.metadatas[row] = dict(metadatas[i])
+
+        self._changed()
+
+    def delete(self, ids=None, where=None):
+        drop = np.zeros(self.size, dtype=bool)
+        if ids is not None:
+            rows = self._rows()
+            drop[[rows[i] for i in ids if i in rows]] = True
+        if where is not None:
+            drop |= self._mask(where)
+        if not drop.any():
+            return
+
+        keep = np.nonzero(~drop)[0]
+        self.vectors = np.array(self.vectors[keep], dtype=np.float32)
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self.size = len(keep)
+        self.row = None
+        self._changed()
+
+    def flush(self):
+        if not self.dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_faiss_flat(self.index_path, self.vectors[:self.size])
+
+        entries = [
+            {"id": doc_id, "document": document, "metadata": metadata}
+            for doc_id, document, metadata in zip(self.ids, self.documents, self.metadatas)
+        ]
+        tmp = Path(f"{self.metadata_path}.tmp")
+        tmp.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.metadata_path)
+
+        # Serve reads from the page cache again
+        self.vectors = read_faiss_flat(self.index_path)
+        self.dirty = False
+
+    # ---------- reads ----------
+
+    def count(self):
+        return self.size
+
+    def _column(self, key):
+        """Numeric metadata field as a float64 array (NaN where absent)."""
+        column = self._columns.get(key)
+        if column is None:
+            column = np.fromiter(
+                (v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                 for v in (m.get(key) for m in self.metadatas)),
+                dtype=np.float64, count=self.size,
+            )
+            self._columns[key] = column
+        return column
+
+    def _mask(self, where):
+        key = json.dumps(where, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+
+        field, condition = next(iter(where.items())) if len(where) == 1 else (None, None)
+        if field == "$and":
+            mask = np.logical_and.reduce([self._mask(clause) for clause in condition])
+        elif isinstance(condition, dict) and condition.keys() <= RANGE_OPS.keys():
+            # Range over a numeric field (e.g. a hier_pos subtree): vectorized
+            column = self._column(field)
+            mask = np.ones(self.size, dtype=bool)
+            for op, operand in condition.items():
+                mask &= RANGE_OPS[op](column, operand)
+        else:
+            mask = np.fromiter((matches(m, where) for m in self.metadatas),
+                               dtype=bool, count=self.size)
+        self._masks[key] = mask
+        return mask
+
+    def _candidates(self, query, where, n_results):
+        """Row ids to scan for one query; None means every row."""
+        if not where:
+            return None
+        return np.nonzero(self._mask(where))[0]
+
+    def _payload(self, rows, include):
+        payload = {"ids": [self.ids[i] for i in rows]}
+        for field, values in (("metadatas", self.metadatas), ("documents", self.documents)):
+            payload[field] = [values[i] for i in rows] if field in include else None
+        return payload
+
+    def _search(self, query, where, n_results):
+        """(rows, squared L2 distances) of the n_results nearest, best first."""
+        vectors = self.vectors[:self.size]
+        if self._norms is None:
+            self._norms = _blockwise(vectors, lambda block: np.einsum("ij,ij->i", block, block))
+
+        rows = self._candidates(query, where, n_results)
+        if rows is None:
+            distances = self._norms - 2 * _blockwise(vectors, lambda block: block @ query)
+            rows = np.arange(self.size)
+        else:
+            distances = self._norms[rows] - 2 * (vectors[rows] @ query)
+
+        top = _smallest(distances, n_results)
+        return rows[top], distances[top] + float(query @ query)
+
+    def query(self, query_embeddings, n_results=10, where=None,
+              include=("metadatas", "documents", "distances")):
+        result = {"ids": [], "metadatas": [], "documents": [], "distances": []}
+        for query in np.asarray(query_embeddings, dtype=np.float32):
+            rows, distances = self._search(query, where, n_results)
+
+            payload = self._payload(rows, include)
+            for field in ("ids", "metadatas", "documents"):
+                result[field].append(payload[field])
+            result["distances"].append(distances.tolist())
+
+        for field in ("metadatas", "documents", "distances"):
+            if field not in include:
+                result[field] = None
+        return result
+
+    def get(self, ids=None, where=None, include=("metadatas", "documents"),
+            limit=None, offset=0):
+        if ids is not None:
+            rows_by_id = self._rows()
+            rows = [rows_by_id[i] for i in ids if i in rows_by_id]
+            if where:
+                mask = self._mask(where)
+                rows = [r for r in rows if mask[r]]
+        elif where:
+            rows = np.nonzero(self._mask(where))[0].tolist()
+        else:
+            rows = range(self.size)
+
+        rows = list(rows)[offset:None if limit is None else offset + limit]
+        return self._payload(rows, include)
+
+
+class IVFBackend(FlatBackend):
+    """
+    Flat storage plus a k-means coarse quantizer: each vector belongs to
+    its nearest of ~sqrt(n) centroids, and a query scans only the lists
+    of its nprobe nearest centroids (widened when a filter leaves too few).
+    """
+
+    def __init__(self, root=DATA_DIR, nprobe=IVF_NPROBE):
+        super().__init__(root)
+        self.ivf_path = self.root / IVF_NAME
+        self.nprobe = nprobe
+        self.centroids = None
+        self.assign = None
+
+    def _load(self):
+        super()._load()
+        if self.ivf_path.exists():
+            with np.load(self.ivf_path) as ivf:
+                if len(ivf["assign"]) == self.size:
+                    self.centroids = ivf["centroids"]
+                    self.assign = ivf["assign"]
+
+    def _changed(self):
+        super()._changed()
+        self.centroids = None
+        self.assign = None
+
+    def train(self, seed=0):
+        vectors = np.asarray(self.vectors[:self.size])
+        nlist = max(1, int(np.sqrt(self.size)))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(self.size, nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = vectors[rng.choice(self.size, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = self._nearest(sample, centroids)
+            for c in range(nlist):
+                members = sample[nearest == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+
+        self.centroids = centroids
+        self.assign = self._nearest(vectors, centroids).astype(np.int32)
+
+    @staticmethod
+    def _nearest(vectors, centroids):
+        distances = np.einsum("ij,ij->i", centroids, centroids)[None, :] - 2 * vectors @ centroids.T
+        return distances.argmin(axis=1)
+
+    def flush(self):
+        super().flush()
+        if self.assign is None and self.size:
+            self.train()
+            np.savez(self.ivf_path, centroids=self.centroids, assign=self.assign)
+
+    def _candidates(self, query, where, n_results):
+        if not self.size:
+            return None
+        if self.assign is None:
+            self.train()
+
+        allowed = self._mask(where) if where else None
+        order = np.argsort(
+            np.einsum("ij,ij->i", self.centroids, self.centroids) - 2 * self.centroids @ query
+        )
+
+        nprobe = self.nprobe
+        while True:
+            rows = np.nonzero(np.isin(self.assign, order[:nprobe]))[0]
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            if len(rows) >= n_results or nprobe >= len(order):
+                return rows
+            nprobe *= 2
+
+
+class QuantizedBackend(FlatBackend):
+    """
+    First-stage search over compact codes held in RAM, exact re-ranking
+    from the float32 memmap:
+
+      int8    per-row symmetric scale, ~4x smaller than float32
+      binary  one sign bit per dimension (Hamming distance), ~32x smaller
+
+    The best n_results * rerank candidates by approximate distance are
+    re-scored with full-precision rows, so only those pages of
+    ccr_faiss.index are ever read at query time.
+    """
+
+    mode = "int8"
+    default_rerank = INT8_RERANK
+
+    def __init__(self, root=DATA_DIR, rerank=None):
+        super().__init__(root)
+        self.quant_path = self.root / f"ccr_quant_{self.mode}.npz"
+        self.rerank = rerank or self.default_rerank
+        self.codes = None
+        self.scales = None
+        self.norms = None
+
+    def _load(self):
+        super()._load()
+        if self.quant_path.exists():
+            with np.load(self.quant_path) as quant:
+                if len(quant["codes"]) == self.size:
+                    self.codes = quant["codes"]
+                    self.scales = quant["scales"]
+                    self.norms = quant["norms"]
+
+    def _changed(self):
+        super()._changed()
+        self.codes = None
+        self.scales = None
+        self.norms = None
+
+    def quantize(self):
+        """Encode every row, streaming the float vectors in blocks."""
+        codes = []
+        scales = []
+        norms = []
+        for start in range(0, self.size, QUANT_BLOCK):
+            block = np.asarray(self.vectors[start:min(start + QUANT_BLOCK, self.size)])
+            if self.mode == "binary":
+                codes.append(np.packbits(block > 0, axis=1))
+                scales.append(np.ones(len(block), dtype=np.float32))
+            else:
+                scale = np.abs(block).max(axis=1) / 127
+                scale[scale == 0] = 1
+                quantized = np.rint(block / scale[:, None])
+                codes.append(quantized.astype(np.int8))
+                scales.append(scale.astype(np.float32))
+                norms.append((scale * scale * np.einsum("ij,ij->i", quantized, quantized))
+                             .astype(np.float32))
+
+        width = (self.vectors.shape[1] + 7) // 8 if self.mode == "binary" else self.vectors.shape[1]
+        dtype = np.uint8 if self.mode == "binary" else np.int8
+        self.codes = np.concatenate(codes) if codes else np.empty((0, width), dtype=dtype)
+        self.scales = np.concatenate(scales) if scales else np.empty(0, dtype=np.float32)
+        self.norms = np.concatenate(norms) if norms else np.zeros(len(self.codes), dtype=np.float32)
+
+    def flush(self):
+        super().flush()
+        if self.codes is None and self.size:
+            self.quantize()
+            np.savez(self.quant_path, codes=self.codes, scales=self.scales, norms=self.norms)
+
+    def memory_bytes(self):
+        """RAM held for first-stage search (the float32 rows stay on disk)."""
+        if self.codes is None:
+            self.quantize()
+        return self.codes.nbytes + self.scales.nbytes + self.norms.nbytes
+
+    def _approximate(self, query, rows):
+        """Approximate distance ranking for code rows (smaller is nearer)."""
+        codes = self.codes if rows is None else self.codes[rows]
+        distances = np.empty(len(codes), dtype=np.float32)
+
+        if self.mode == "binary":
+            bits = np.packbits(query > 0)
+            for start in range(0, len(codes), QUANT_BLOCK):
+                block = np.bitwise_xor(codes[start:start + QUANT_BLOCK], bits)
+                distances[start:start + QUANT_BLOCK] = POPCOUNT[block].sum(axis=1)
+            return distances
+
+        # ||s*c - q||^2 ranks like s^2 ||c||^2 - 2 s (c . q)
+        scales = self.scales if rows is None else self.scales[rows]
+        norms = self.norms if rows is None else self.norms[rows]
+        for start in range(0, len(codes), QUANT_BLOCK):
+            block = codes[start:start + QUANT_BLOCK].astype(np.float32)
+            end = start + len(block)
+            distances[start:end] = norms[start:end] - 2 * scales[start:end] * (block @ query)
+        return distances
+
+    def _search(self, query, where, n_results):
+        if self.codes is None:
+            self.quantize()
+
+        rows = self._candidates(query, where, n_results)
+        shortlist = _smallest(self._approximate(query, rows), n_results * self.rerank)
+        if rows is not None:
+            shortlist = rows[shortlist]
+
+        # Exact re-rank: touches only the shortlisted rows of the memmap
+        shortlist = np.sort(shortlist)
+        exact = ((np.asarray(self.vectors[shortlist]) - query) ** 2).sum(axis=1)
+        top = _smallest(exact, n_results)
+        return shortlist[top], exact[top]
+
+
+class BinaryBackend(QuantizedBackend):
+    mode = "binary"
+    default_rerank = BINARY_RERANK
+
+
+LOCAL_BACKENDS = {
+    "flat": FlatBackend,
+    "ivf": IVFBackend,
+    "int8": QuantizedBackend,
+    "binary": BinaryBackend,
+}
+
+
+def open_collection(backend=DEFAULT_BACKEND, root=DATA_DIR, create=False, rebuild=False):
+    """The CCR section store for `backend` (one of BACKENDS)."""
+    if backend == "chroma":
+        return ChromaBackend.open(root, create, rebuild)
+    if backend in LOCAL_BACKENDS:
+        return LOCAL_BACKENDS[backend].open(root, create, rebuild)
+    raise ValueError(f"unknown vector backend: {backend} (choose from {', '.join(BACKENDS)})")
@@ -1,63 +1,239 @@
+import argparse
+import hashlib
 import json
+import sys
+from functools import lru_cache
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-import chromadb
+
+from embedder import DEFAULT_BATCH_SIZE, Embedder
+from relevance import section_features
+from vector_backends import BACKENDS, DEFAULT_BACKEND, open_collection
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+import metrics  # noqa: E402
+import section_store  # noqa: E402
+from hierarchy import load_tree  # noqa: E402
+from section_store import SectionStore  # noqa: E402
+from url_canon import document_guid  # noqa: E402
 
 DATA_FILE = Path("data/ccr_sections_enriched.jsonl")
-CHROMA_PATH = "data/chroma_db"
-COLLECTION_NAME = "ccr_sections"
+MANIFEST_FILE = Path("data/crawl_manifest.json")
+
+# Metadata that changes on every run without the section changing
+HASH_EXCLUDED = {"retrieved_at", "content_hash"}
+
+GET_PAGE_SIZE = 5000
 
 def safe(value):
     """Ensure ChromaDB-compatible metadata values"""
     return str(value) if value is not None else ""
 
-def main():
-    # Persistent Chroma client
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
+def section_id(record):
+    """
+    Stable id for a section: its Westlaw Document GUID, falling back to
+    a hash of the source URL (or citation) for pages without one.
+    """
+    source_url = record.get("source_url") or ""
 
-    # Idempotent collection creation
-    collection = client.get_or_create_collection(
-        name=COLLECTION_NAME
-    )
+    guid = document_guid(source_url)
+    if guid:
+        return f"ccr_{guid}"
+
+    key = source_url or record.get("citation") or ""
+    return "ccr_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+@lru_cache(maxsize=1)
+def hierarchy_tree():
+    """data/ccr_hierarchy.jsonl (build_ccr_hierarchy.py), or None."""
+    return load_tree()
+
+def hierarchy_position(record):
+    """Preorder position of the section in the CCR tree; -1 if unplaced."""
+    tree = hierarchy_tree()
+    if tree is None:
+        return -1
+    return tree.by_citation.get(record.get("citation"), -1)
 
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+def content_hash(document, metadata):
+    stable = {k: v for k, v in metadata.items() if k not in HASH_EXCLUDED}
+    payload = json.dumps(stable, sort_keys=True, ensure_ascii=False) + "\n" + document
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    documents = []
-    metadatas = []
-    ids = []
+def build_metadata(record):
+    metadata = {
+        "title_number": safe(record.get("title_number")),
+        "title_name": safe(record.get("title_name")),
+        "division": safe(record.get("division")),
+        "chapter": safe(record.get("chapter")),
+        "article": safe(record.get("article")),
+        "section_number": safe(record.get("section_number")),
+        "section_name": safe(record.get("section_name")),
+        "citation": safe(record.get("citation")),
+        "breadcrumb_path": safe(record.get("breadcrumb_path")),
+        "source_url": safe(record.get("source_url")),
+        "retrieved_at": safe(record.get("retrieved_at")),
+        # Subtree filters are ranges over this (see crawler/hierarchy.py)
+        "hier_pos": hierarchy_position(record),
+    }
+    # Facility keyword/title hits, precomputed for query-time scoring
+    metadata.update(section_features(record.get("title_name"), record.get("content_markdown")))
+    metadata["content_hash"] = content_hash(record.get("content_markdown") or "", metadata)
+    return metadata
 
+def existing_hashes(collection):
+    """{id: content_hash} for everything already in the collection."""
+    hashes = {}
+    offset = 0
+
+    while True:
+        page = collection.get(include=["metadatas"], limit=GET_PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            return hashes
+
+        for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+            hashes[doc_id] = (metadata or {}).get("content_hash")
+        offset += len(page["ids"])
+
+def iter_enriched(delta=None):
     with open(DATA_FILE, "r", encoding="utf-8") as f:
-        for i, line in enumerate(f):
+        for line in f:
             record = json.loads(line)
+            if delta is None or record.get("source_url") in delta:
+                yield record
+
+def load_sections(delta=None, store=None):
+    """
+    (ids, documents, metadatas) for the enriched file, one entry per id.
+    With store (a SectionStore path) the rows come from SQLite instead;
+    a delta is then a handful of indexed lookups, not a file scan.
+    """
+    sections = {}
+
+    if store:
+        with SectionStore(store) as db:
+            records = list(db.records(delta))
+    else:
+        records = iter_enriched(delta)
+
+    for record in records:
+        doc_id = section_id(record)
+        if doc_id in sections:
+            print(f"⚠️ Duplicate section {doc_id}; keeping the later record")
+
+        sections[doc_id] = (record["content_markdown"], build_metadata(record))
+
+    ids = list(sections)
+    documents = [sections[i][0] for i in ids]
+    metadatas = [sections[i][1] for i in ids]
+    return ids, documents, metadatas
+
+def upsert_embedded(collection, embedder, ids, documents, metadatas):
+    """Embed in engine-sized chunks and upsert with precomputed vectors."""
+    step = embedder.batch_size * 32
+
+    for start in range(0, len(ids), step):
+        docs = documents[start:start + step]
+        embeddings = embedder.encode(docs).tolist()
+        with metrics.span("upsert"):
+            collection.upsert(
+                ids=ids[start:start + step],
+                embeddings=embeddings,
+                documents=docs,
+                metadatas=metadatas[start:start + step],
+            )
+        metrics.inc("records_total", len(docs), stage="upsert")
+        print(f"  ↳ {min(start + step, len(ids))}/{len(ids)} "
+              f"({embedder.rate():.1f} sections/sec)")
+
+def apply_manifest(collection, embedder, manifest_path, store=None):
+    """Re-embed only sections a recrawl reported as added/changed/removed."""
+    manifest = json.loads(Path(manifest_path).read_text(encoding="utf-8"))
+    delta = set(manifest["added"]) | set(manifest["changed"])
+    stale = list(set(manifest["changed"]) | set(manifest["removed"]))
+
+    if stale:
+        collection.delete(where={"source_url": {"$in": stale}})
+
+    ids, documents, metadatas = load_sections(delta, store)
+
+    print(f"🔢 Embedding {len(documents)} changed CCR sections "
+          f"({len(stale)} stale sections removed)...")
+
+    if documents:
+        upsert_embedded(collection, embedder, ids, documents, metadatas)
+
+    print("✅ Vector index updated from recrawl manifest")
+
+def sync(collection, embedder, incremental, store=None):
+    """
+    Make the collection match the enriched file (or store). In incremental
+    mode only sections whose content hash is new or different are embedded.
+    """
+    ids, documents, metadatas = load_sections(store=store)
+    current = existing_hashes(collection)
+
+    if incremental:
+        changed = [
+            i for i, (doc_id, metadata) in enumerate(zip(ids, metadatas))
+            if current.get(doc_id) != metadata["content_hash"]
+        ]
+    else:
+        changed = list(range(len(ids)))
+
+    removed = sorted(set(current) - set(ids))
+
+    print(f"🔢 Embedding {len(changed)} of {len(ids)} enriched CCR sections "
+          f"({len(ids) - len(changed)} unchanged, {len(removed)} removed)...")
+
+    if removed:
+        collection.delete(ids=removed)
+
+    if changed:
+        upsert_embedded(
+            collection,
+            embedder,
+            [ids[i] for i in changed],
+            [documents[i] for i in changed],
+            [metadatas[i] for i in changed],
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Index enriched CCR sections")
+    parser.add_argument("--manifest", nargs="?", const=str(MANIFEST_FILE),
+                        help="only re-embed sections added/changed in a recrawl manifest")
+    parser.add_argument("--incremental", action="store_true",
+                        help="embed only new or changed sections (by content hash)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="texts per model forward pass")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="CPU worker processes for embedding (0 = in-process)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass the on-disk embedding cache")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="vector store: Chroma or the local flat/IVF index")
+    section_store.add_arguments(parser)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    # Idempotent collection creation
+    collection = open_collection(args.backend, create=True)
+
+    with Embedder(batch_size=args.batch_size, processes=args.processes,
+                  use_cache=not args.no_cache) as embedder:
+        if args.manifest:
+            apply_manifest(collection, embedder, args.manifest, args.store)
+        else:
+            # Stable ids + upsert: safe to re-run, stale sections are deleted
+            sync(collection, embedder, args.incremental, args.store)
+            print("✅ CCR sections embedded from enriched dataset")
+
+        with metrics.span("upsert", phase="flush"):
+            collection.flush()
+        print(f"💾 Persisted {collection.count()} sections ({args.backend} backend)")
 
-            documents.append(record["content_markdown"])
-
-            metadatas.append({
-                "title_number": safe(record.get("title_number")),
-                "title_name": safe(record.get("title_name")),
-                "division": safe(record.get("division")),
-                "chapter": safe(record.get("chapter")),
-                "article": safe(record.get("article")),
-                "section_number": safe(record.get("section_number")),
-                "section_name": safe(record.get("section_name")),
-                "citation": safe(record.get("citation")),
-                "breadcrumb_path": safe(record.get("breadcrumb_path")),
-                "source_url": safe(record.get("source_url")),
-                "retrieved_at": safe(record.get("retrieved_at")),
-            })
-
-            ids.append(f"ccr_{i}")
-
-    print(f"🔢 Embedding {len(documents)} enriched CCR sections...")
-
-    # Idempotent re-indexing
-    collection.add(
-        documents=documents,
-        metadatas=metadatas,
-        ids=ids
-    )
-
-    print("✅ CCR sections embedded from enriched dataset and persisted to disk")
+        print(embedder.report())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+"""
+Measure parse throughput of crawler/parallel_parse.py as workers increase.
+
+Replicates the shipped sections_content.jsonl sample up to --pages records
+and runs clean_record and href extraction through parallel_map with each
+worker count.
+
+    python benchmarks/bench_parallel_parse.py --pages 100000 --workers 1 2 4 8
+"""
+import argparse
+import json
+import sys
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+from blob_store import resolve  # noqa: E402
+from clean_sections import INPUT_FILE, clean_record  # noqa: E402
+from parallel_parse import default_workers, iter_hrefs, parallel_map  # noqa: E402
+
+
+def count_hrefs(record):
+    return sum(1 for _ in iter_hrefs(record["html"]))
+
+
+def load_sample():
+    sample = []
+    with open(INPUT_FILE, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            sample.append({
+                "url": record["url"],
+                "html": resolve(record, "html"),
+                "markdown": resolve(record, "markdown"),
+            })
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, default_workers()}))
+    args = parser.parse_args()
+
+    sample = load_sample()
+    print(f"🧪 {args.pages} pages replicated from {len(sample)} crawled sections\n")
+    print(f"{'workers':>8} {'stage':>8} {'pages/s':>10}")
+
+    for workers in args.workers:
+        for name, func in (("clean", clean_record), ("links", count_hrefs)):
+            pages = islice(cycle(sample), args.pages)
+
+            started = time.perf_counter()
+            for _ in parallel_map(func, pages, workers):
+                pass
+            elapsed = time.perf_counter() - started
+
+            print(f"{workers:>8} {name:>8} {args.pages / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
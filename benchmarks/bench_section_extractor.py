@@ -0,0 +1,135 @@
+"""
+Per-field cost of section metadata extraction: the separate regex
+searches clean_sections.py used to run versus the single-pass
+crawler/section_extractor.py.
+
+Each legacy field is timed on its own over the same pages (title and
+section regexes over the whole page, the line-by-line preamble walk
+hierarchy.py used to do, the >40-character line filter that stood in for
+a body), then their sum is set against one extract() call that returns
+all of them.
+
+    python benchmarks/bench_section_extractor.py --pages 20000
+    python benchmarks/bench_section_extractor.py --input data/sections_content.jsonl
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "crawler"))
+
+from blob_store import resolve  # noqa: E402
+from hierarchy import parse_level  # noqa: E402
+from section_extractor import extract  # noqa: E402
+from synthetic_corpus import generate  # noqa: E402
+
+REPEATS = 3
+
+# What clean_sections.py / extract_section_content.py ran before
+SECTION_REGEX = re.compile(r"§\s*(\d+(?:\.\d+)*)\.?\s*([A-Z][^\n]+)", re.IGNORECASE)
+TITLE_REGEX = re.compile(r"Title\s+(\d+)\.\s*([A-Za-z &]+)")
+CCR_LINE = re.compile(r"^\d+\s+CCR\s")
+
+
+def legacy_title(markdown):
+    match = TITLE_REGEX.search(markdown)
+    return (match.group(1), match.group(2).strip()) if match else (None, None)
+
+
+def legacy_section(markdown):
+    match = SECTION_REGEX.search(markdown)
+    return (match.group(1), match.group(2).strip()) if match else (None, None)
+
+
+def legacy_hierarchy(markdown):
+    """The old hierarchy.section_path: walk up from the "NN CCR" line."""
+    lines = markdown.splitlines()
+    for i, line in enumerate(lines):
+        if CCR_LINE.match(line.strip()):
+            break
+    else:
+        return []
+
+    path = []
+    for line in reversed(lines[:i]):
+        level = parse_level(line)
+        if level is None:
+            break
+        path.append(level)
+    path.reverse()
+
+    return path if path and path[0][0] == "title" else []
+
+
+def legacy_body(markdown):
+    return "\n".join(line.strip() for line in markdown.splitlines() if len(line.strip()) > 40)
+
+
+LEGACY_FIELDS = {
+    "title": legacy_title,
+    "section": legacy_section,
+    "hierarchy": legacy_hierarchy,
+    "body": legacy_body,
+}
+
+
+def load_pages(path, pages):
+    if path is None:
+        sample = [record["markdown"] for record in generate(min(pages, 10000))]
+    else:
+        with open(path, encoding="utf-8") as f:
+            sample = [resolve(json.loads(line), "markdown") for line in f if line.strip()]
+    return list(islice(cycle(sample), pages))
+
+
+def best_of(func, markdowns):
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        for markdown in markdowns:
+            func(markdown)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--input", help="crawled-page JSONL (default: synthetic corpus)")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    markdowns = load_pages(args.input, args.pages)
+    print(f"🧪 {len(markdowns)} pages ({args.input or 'synthetic corpus'})\n")
+    print(f"{'field':>12} {'µs/page':>10} {'pages/s':>12}")
+
+    def row(name, seconds):
+        per_page = seconds / len(markdowns) * 1e6
+        print(f"{name:>12} {per_page:>10.2f} {len(markdowns) / seconds:>12.0f}")
+        return {"us_per_page": round(per_page, 3), "per_sec": round(len(markdowns) / seconds, 1)}
+
+    results = {"legacy": {}}
+    total = 0.0
+    for name, func in LEGACY_FIELDS.items():
+        seconds = best_of(func, markdowns)
+        total += seconds
+        results["legacy"][name] = row(name, seconds)
+    results["legacy"]["total"] = row("legacy sum", total)
+
+    seconds = best_of(extract, markdowns)
+    results["single_pass"] = row("extract()", seconds)
+    print(f"\n⚡ Single pass: {total / seconds:.2f}x the legacy throughput")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"pages": len(markdowns), **results}, indent=2),
+                                     encoding="utf-8")
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
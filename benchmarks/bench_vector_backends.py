@@ -0,0 +1,201 @@
+"""
+Compare the vector backends in agent/vector_backends.py.
+
+Each backend is built over the same seeded synthetic corpus of
+clustered, normalized vectors with facility-flag metadata, then loaded
+and queried in a fresh child process, so its peak RSS is what serving
+costs. Reports build time, load time, query latency with and without a
+`where` filter, recall@k against exact search (computed once by the
+parent), the RAM held for vector search, and peak RSS.
+
+    python benchmarks/bench_vector_backends.py --sections 100000 --backends flat ivf int8 binary chroma
+"""
+import argparse
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "agent"))
+
+from vector_backends import BACKENDS, open_collection  # noqa: E402
+
+UPSERT_CHUNK = 1024
+CLUSTERS = 64
+WHERE = {"fac_restaurant": True}
+
+
+def synthetic_corpus(sections, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((CLUSTERS, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, CLUSTERS, sections)]
+    vectors += 0.5 * rng.standard_normal((sections, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    ids = [f"ccr_{i:08d}" for i in range(sections)]
+    metadatas = [
+        {"fac_restaurant": bool(i % 4 == 0), "fac_farm": bool(i % 7 == 0), "division": str(i % 10)}
+        for i in range(sections)
+    ]
+    return ids, vectors, metadatas
+
+
+def queries_for(vectors, count, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    noisy = picks + 0.2 * rng.standard_normal(picks.shape).astype(np.float32)
+    return noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors, queries, k, allowed=None):
+    rows = np.arange(len(vectors)) if allowed is None else np.nonzero(allowed)[0]
+    truth = []
+    for q in queries:
+        distances = ((vectors[rows] - q) ** 2).sum(axis=1)
+        truth.append(rows[np.argsort(distances)[:k]])
+    return np.array(truth)
+
+
+def timed_queries(collection, queries, k, where):
+    latencies = []
+    results = []
+    for q in queries:
+        started = time.perf_counter()
+        response = collection.query(query_embeddings=[q.tolist()], n_results=k,
+                                    where=where, include=["metadatas"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(response["ids"][0])
+    return np.array(latencies), results
+
+
+def recall(results, truth):
+    hits = sum(
+        len({int(doc_id[4:]) for doc_id in found} & set(expected.tolist()))
+        for found, expected in zip(results, truth)
+    )
+    return hits / truth.size
+
+
+def peak_rss_mb():
+    # ru_maxrss survives fork + exec on Linux (it would report the parent's
+    # peak); VmHWM is this process image's own high-water mark
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def vector_ram_mb(collection):
+    if hasattr(collection, "memory_bytes"):
+        return collection.memory_bytes() / 2**20
+    if hasattr(collection, "vectors"):
+        # Exact search pages the whole float32 matrix in
+        return collection.size * collection.vectors.shape[1] * 4 / 2**20
+    return float("nan")
+
+
+def build_child(args):
+    ids, vectors, metadatas = synthetic_corpus(args.sections, args.dim)
+
+    started = time.perf_counter()
+    collection = open_collection(args.child, root=Path(args.root) / args.child, rebuild=True)
+    for i in range(0, len(ids), UPSERT_CHUNK):
+        collection.upsert(ids=ids[i:i + UPSERT_CHUNK],
+                          embeddings=vectors[i:i + UPSERT_CHUNK].tolist(),
+                          documents=ids[i:i + UPSERT_CHUNK],
+                          metadatas=metadatas[i:i + UPSERT_CHUNK])
+    collection.flush()
+    print(json.dumps({"build_s": time.perf_counter() - started}))
+
+
+def query_child(args):
+    workload = np.load(Path(args.root) / "workload.npz")
+
+    started = time.perf_counter()
+    collection = open_collection(args.child, root=Path(args.root) / args.child)
+    report = {"load_s": time.perf_counter() - started}
+
+    for label, where in (("all", None), ("filtered", WHERE)):
+        latencies, results = timed_queries(collection, workload["queries"], args.k, where)
+        report[f"{label}_p50_ms"] = float(np.percentile(latencies, 50))
+        report[f"{label}_p95_ms"] = float(np.percentile(latencies, 95))
+        report[f"{label}_recall"] = recall(results, workload[f"{label}_truth"])
+
+    report["vector_ram_mb"] = vector_ram_mb(collection)
+    report["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(report))
+
+
+def run_child(args, phase):
+    child = subprocess.run(
+        [sys.executable, __file__, "--child", args.backend_name, "--phase", phase,
+         "--root", args.root, "--sections", str(args.sections), "--dim", str(args.dim),
+         "--k", str(args.k)],
+        capture_output=True, text=True,
+    )
+    if child.returncode != 0:
+        raise RuntimeError(child.stderr.strip().splitlines()[-1])
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sections", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                        default=["flat", "ivf", "int8", "binary"])
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--phase", choices=["build", "query"], help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        (build_child if args.phase == "build" else query_child)(args)
+        return
+
+    args.root = tempfile.mkdtemp(prefix="ccr_vector_bench_")
+    print(f"🧪 {args.sections} sections × {args.dim} dims, {args.queries} queries, k={args.k}\n")
+
+    # Ground truth once, by brute force over the float32 corpus
+    _, vectors, metadatas = synthetic_corpus(args.sections, args.dim)
+    queries = queries_for(vectors, args.queries)
+    allowed = np.array([m["fac_restaurant"] for m in metadatas])
+    np.savez(Path(args.root) / "workload.npz", queries=queries,
+             all_truth=exact_top_k(vectors, queries, args.k),
+             filtered_truth=exact_top_k(vectors, queries, args.k, allowed))
+    del vectors, metadatas
+
+    print(f"{'backend':>8} {'build s':>8} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'recall':>6} {'filt p50':>8} {'filt rec':>8} {'vec MB':>7} {'RSS MB':>7}")
+
+    try:
+        for backend in args.backends:
+            args.backend_name = backend
+            try:
+                r = {**run_child(args, "build"), **run_child(args, "query")}
+            except RuntimeError as e:
+                print(f"{backend:>8} failed: {e}")
+                continue
+
+            print(f"{backend:>8} {r['build_s']:>8.2f} {r['load_s']:>7.3f} "
+                  f"{r['all_p50_ms']:>7.2f} {r['all_p95_ms']:>7.2f} {r['all_recall']:>6.3f} "
+                  f"{r['filtered_p50_ms']:>8.2f} {r['filtered_recall']:>8.3f} "
+                  f"{r['vector_ram_mb']:>7.1f} {r['peak_rss_mb']:>7.0f}")
+    finally:
+        shutil.rmtree(args.root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Exercise crawler/fetch_pool.py against a local stand-in for govt.westlaw.com.
+
+Starts a threaded HTTP server that serves fake section pages with a fixed
+latency (and a periodic 503 to exercise retries), then crawls it with an
+increasing number of workers and reports pages/min for each run.
+
+    python benchmarks/crawl_pool_harness.py --pages 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "crawler"))
+
+from fetch_pool import FetchError, run_pool  # noqa: E402
+
+
+def make_handler(latency, fail_every):
+    hits = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+
+            with lock:
+                hits[self.path] = hits.get(self.path, 0) + 1
+                first_hit = hits[self.path] == 1
+
+            # Every `fail_every`-th page answers 503 on its first request
+            page_no = int(self.path.rsplit("/", 1)[-1] or 0)
+            if fail_every and first_hit and page_no % fail_every == 0:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            body = (
+                f"<html><body><h1>§ {page_no}. Stand-in Section</h1>"
+                f"<p>Section body {page_no}</p></body></html>"
+            ).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def fetch_blocking(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as resp:
+            return resp.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        raise FetchError(f"HTTP {e.code}") from e
+
+
+async def fetch(url):
+    return await asyncio.to_thread(fetch_blocking, url)
+
+
+async def crawl(urls, workers, rate, ordered):
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max(workers, 4))
+    )
+
+    seen = []
+    errors = 0
+    started = time.monotonic()
+
+    async for url, body, error in run_pool(
+        urls, fetch, workers=workers, rate=rate, burst=workers,
+        retries=3, base_backoff=0.05, ordered=ordered,
+    ):
+        if error is not None:
+            errors += 1
+            continue
+        assert url.rsplit("/", 1)[-1] in body
+        seen.append(url)
+
+    elapsed = time.monotonic() - started
+    return seen, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="server-side delay per request (seconds)")
+    parser.add_argument("--rate", type=float, default=100.0,
+                        help="per-host rate limit (requests/second)")
+    parser.add_argument("--fail-every", type=int, default=25,
+                        help="every Nth page fails once with 503 (0 = never)")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(args.latency, args.fail_every)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    print(f"🧪 Stand-in server on http://{host}:{port} "
+          f"({args.latency * 1000:.0f} ms latency, {args.rate:g} req/s limit)\n")
+    print(f"{'workers':>8} {'mode':>10} {'pages':>6} {'errors':>6} {'pages/min':>10}")
+
+    failed = False
+
+    try:
+        for workers in args.workers:
+            for ordered in (True, False):
+                # Fresh paths per run so the fail-once pages fail again
+                run_id = f"{workers}-{int(ordered)}"
+                urls = [
+                    f"http://{host}:{port}/calregs/Document/{run_id}/{i}"
+                    for i in range(1, args.pages + 1)
+                ]
+
+                seen, errors, elapsed = asyncio.run(
+                    crawl(urls, workers, args.rate, ordered)
+                )
+
+                if errors or sorted(seen) != sorted(urls):
+                    failed = True
+                if ordered and seen != urls:
+                    failed = True
+
+                mode = "ordered" if ordered else "unordered"
+                per_min = len(seen) / elapsed * 60
+                print(f"{workers:>8} {mode:>10} {len(seen):>6} {errors:>6} {per_min:>10.0f}")
+    finally:
+        server.shutdown()
+
+    if failed:
+        print("\n❌ Harness detected missing, failed or out-of-order pages")
+        sys.exit(1)
+
+    print("\n✅ All pages fetched; ordered runs preserved input order")
+
+
+if __name__ == "__main__":
+    main()
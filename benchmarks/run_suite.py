@@ -0,0 +1,238 @@
+"""
+Benchmark suite over the synthetic CCR corpus.
+
+For each corpus size, times the hot functions of every stage:
+
+    clean       section_extractor.extract (single pass) and clean_record
+    enrich      enrich_sections.build_breadcrumb
+    compliance  inverted index build + compliance_checker.check_compliance
+    relevance   facility_advisor.relevance_score (text) and the mask path
+    embedding   Embedder throughput (skipped without sentence_transformers)
+    query       end-to-end facility_advisor.advise() on a local flat index
+
+and writes one JSON document (environment + per-size, per-stage
+metrics) for regression comparison. --compare prints the ratio of every
+metric against an earlier result file.
+
+    python benchmarks/run_suite.py --sizes 1000 10000 100000 --output bench.json
+    python benchmarks/run_suite.py --sizes 1000 --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "crawler"))
+sys.path.append(str(ROOT / "agent"))
+
+from clean_sections import clean_record  # noqa: E402
+from compliance_checker import check_compliance  # noqa: E402
+from enrich_sections import build_breadcrumb, enrich_record  # noqa: E402
+from facility_advisor import FACILITY_RULES, advise, relevance_score  # noqa: E402
+from inverted_index import InvertedIndex  # noqa: E402
+from relevance import score_sections  # noqa: E402
+from section_extractor import extract  # noqa: E402
+from synthetic_corpus import write as write_corpus  # noqa: E402
+from vector_backends import open_collection  # noqa: E402
+from vector_store import build_metadata, section_id  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000]
+QUERY_REPEATS = 50
+EMBED_SAMPLE = 512
+DIMENSION = 384
+
+SAMPLE_POLICY = """
+Our organization collects personal data from users and may share
+information with third-party service providers. Data retention
+policies apply and disclosures may be required. Employees receive
+sanitation and refrigeration training; pesticide records are retained.
+"""
+
+
+def rate(items, seconds):
+    return {"items": items, "seconds": round(seconds, 6),
+            "per_sec": round(items / seconds, 1) if seconds else None}
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - started
+
+
+def percentiles(latencies_ms):
+    return {"p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3)}
+
+
+# ---------- stages ----------
+
+def bench_clean(pages):
+    markdowns = [p["markdown"] for p in pages]
+    _, extract_s = timed(lambda: [extract(m) for m in markdowns])
+    _, clean_s = timed(lambda: [clean_record(p) for p in pages])
+    return {"extract": rate(len(pages), extract_s),
+            "clean_record": rate(len(pages), clean_s)}
+
+
+def bench_enrich(records):
+    _, seconds = timed(lambda: [build_breadcrumb(r) for r in records])
+    return {"build_breadcrumb": rate(len(records), seconds)}
+
+
+def bench_compliance(corpus_path, sections):
+    index, build_s = timed(InvertedIndex.build, corpus_path)
+    latencies = []
+    for _ in range(QUERY_REPEATS):
+        findings, seconds = timed(check_compliance, SAMPLE_POLICY, index)
+        latencies.append(seconds * 1000)
+    return {"index_build": rate(sections, build_s),
+            "check_compliance": {**percentiles(latencies), "findings": len(findings)}}
+
+
+def bench_relevance(records, metadatas):
+    results = {}
+    for facility in FACILITY_RULES:
+        _, text_s = timed(lambda: [relevance_score(r, facility) for r in records])
+        _, mask_s = timed(score_sections, metadatas, facility)
+        results[facility] = {"relevance_score": rate(len(records), text_s),
+                             "score_sections_masks": rate(len(records), mask_s)}
+    return results
+
+
+def bench_embedding(documents):
+    try:
+        from embedder import Embedder
+        embedder = Embedder()
+    except ImportError as e:
+        return {"skipped": f"embedding model unavailable ({e})"}
+
+    sample = documents[:EMBED_SAMPLE]
+    with embedder:
+        _, seconds = timed(embedder.encode, sample)
+    return {"encode": rate(len(sample), seconds), "batch_size": embedder.batch_size}
+
+
+def bench_query(records, metadatas, workdir):
+    # Seeded random vectors stand in for embeddings: advise() cost does
+    # not depend on what the vectors mean
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((len(records), DIMENSION)).astype(np.float32)
+
+    collection = open_collection("flat", root=workdir, rebuild=True)
+    collection.upsert(ids=[section_id(r) for r in records], embeddings=vectors,
+                      documents=[r["content_markdown"] for r in records],
+                      metadatas=metadatas)
+    collection.flush()
+    collection = open_collection("flat", root=workdir)
+
+    queries = rng.standard_normal((QUERY_REPEATS, DIMENSION)).astype(np.float32)
+    results = {}
+    for facility in FACILITY_RULES:
+        latencies = []
+        for q in queries:
+            _, seconds = timed(advise, facility, collection, q.tolist())
+            latencies.append(seconds * 1000)
+        results[facility] = percentiles(latencies)
+    return {"backend": "flat", "vectors": "random", "advise": results}
+
+
+def run_size(sections, seed):
+    with tempfile.TemporaryDirectory(prefix="ccr_bench_") as workdir:
+        corpus_path = write_corpus(Path(workdir) / "sections_content.jsonl", sections, seed)
+        with open(corpus_path, encoding="utf-8") as f:
+            pages = [json.loads(line) for line in f]
+
+        records = [enrich_record(clean_record(p)) for p in pages]
+        metadatas = [build_metadata(r) for r in records]
+
+        print(f"  clean / enrich ({sections})")
+        result = {"clean": bench_clean(pages), "enrich": bench_enrich(records)}
+        print(f"  compliance ({sections})")
+        result["compliance"] = bench_compliance(corpus_path, sections)
+        print(f"  relevance ({sections})")
+        result["relevance"] = bench_relevance(records, metadatas)
+        print(f"  embedding ({sections})")
+        result["embedding"] = bench_embedding([r["content_markdown"] for r in records])
+        print(f"  query ({sections})")
+        result["query"] = bench_query(records, metadatas, Path(workdir) / "index")
+        return result
+
+
+# ---------- reporting ----------
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def flatten(tree, prefix=""):
+    """{"10000.clean.extract.per_sec": 1234.5, ...} for numeric leaves."""
+    flat = {}
+    for key, value in tree.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current, baseline):
+    now = flatten(current["results"])
+    before = flatten(baseline["results"])
+    print(f"\n📈 Against {baseline['environment'].get('commit')} "
+          f"({baseline['environment'].get('timestamp')}):")
+    for key in sorted(now.keys() & before.keys()):
+        if not key.endswith(("per_sec", "_ms")) or not before[key]:
+            continue
+        ratio = now[key] / before[key]
+        better = ratio >= 1 if key.endswith("per_sec") else ratio <= 1
+        print(f"  {'✅' if better else '⚠️'} {key:<60} {before[key]:>12} → {now[key]:>12} "
+              f"({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="synthetic corpus sizes (e.g. 1000 10000 100000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks/results.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON",
+                        help="print per-metric ratios against an earlier run")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "seed": args.seed, "results": {}}
+    for sections in args.sizes:
+        print(f"🧪 {sections} synthetic sections")
+        report["results"][str(sections)] = run_size(sections, args.seed)
+
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n✅ Benchmark results written to {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
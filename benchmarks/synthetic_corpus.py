@@ -0,0 +1,169 @@
+"""
+Deterministic synthetic CCR corpus.
+
+Produces crawled-page records shaped like data/sections_content.jsonl
+({"url", "markdown"}): Westlaw navigation junk, a "# § N. Name." heading,
+the Title / Division / Chapter / Article preamble, the bold section
+heading, numbered paragraphs mixing legal boilerplate with facility
+keywords and cross-references, and the page footer. The same seed and
+size always give byte-identical output.
+
+    python benchmarks/synthetic_corpus.py --sections 10000 --output data/synthetic_10k.jsonl
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+
+URL_TEMPLATE = (
+    "https://govt.westlaw.com/calregs/Document/{guid}?viewType=FullText"
+    "&originationContext=documenttoc&transitionType=CategoryPageItem"
+    "&contextData=(sc.Default)"
+)
+
+TITLES = [
+    (3, "Food and Agriculture"),
+    (4, "Business Regulations"),
+    (8, "Industrial Relations"),
+    (10, "Investment"),
+    (14, "Natural Resources"),
+    (17, "Public Health"),
+    (19, "Public Safety"),
+    (22, "Social Security"),
+    (24, "Building Standards"),
+    (27, "Environmental Protection"),
+]
+
+SUBJECTS = [
+    "Food Handling", "Pesticide Application", "Fire Safety", "Occupancy Limits",
+    "Employee Training", "Permit Applications", "Livestock Inspection",
+    "Refrigeration Equipment", "Public Assembly", "Sanitation Standards",
+    "Securities Registration", "Emergency Exits", "Fertilizer Labeling",
+    "Alcoholic Beverage Licensing", "Recordkeeping", "Definitions",
+]
+
+BOILERPLATE = [
+    "Except as otherwise provided in this article,",
+    "Notwithstanding any other provision of this division,",
+    "For purposes of this chapter,",
+    "Upon written request of the department,",
+    "Within thirty days after the effective date,",
+]
+
+CLAUSES = [
+    "each operator shall maintain written records of every {kw} activity",
+    "the licensee shall ensure that all {kw} procedures comply with applicable standards",
+    "no person shall conduct {kw} operations without a valid permit",
+    "the department may conduct an inspection of any {kw} facility during business hours",
+    "an employer shall provide training on {kw} practices to each employee",
+    "records relating to {kw} shall be retained for not less than three years",
+]
+
+KEYWORDS = [
+    "food", "restaurant", "sanitation", "hygiene", "kitchen", "health",
+    "alcohol", "beverage", "refrigeration", "farm", "agriculture", "pesticide",
+    "fertilizer", "livestock", "environment", "theater", "public assembly",
+    "fire safety", "occupancy", "emergency", "investment", "securities",
+]
+
+NAV = (
+    "[Skip to Navigation]({url}) [Skip to Main Content]({url})\n"
+    "[ ![Thomson Reuters Westlaw](https://s1-govt.westlaw.com/WeblinksStaticContent_2601.1.2006/"
+    "Products/Weblinks/css/images/westlaw-next-logo-print.png) ](http://next.westlaw.com "
+    "\"Thomson Reuters Westlaw\") [ California Code of Regulations ]"
+    "(https://govt.westlaw.com/calregs/Index)\n"
+    "  * [](https://govt.westlaw.com/calregs/Index)\n"
+    "  * [](https://govt.westlaw.com/calregs/Search/Index)\n"
+    "  * [](https://govt.westlaw.com/calregs/Help)\n\n\n"
+    "[Home](https://govt.westlaw.com/calregs/Browse/Home/California/CaliforniaCodeofRegulations) "
+    "[Table of Contents](https://govt.westlaw.com/calregs/Browse/Home/California/"
+    "CaliforniaCodeofRegulations?guid={parent})\n"
+)
+
+FOOTER = (
+    "\nNote: Authority cited: Section {auth}, Government Code. "
+    "Reference: Section {ref}, Government Code.\n"
+    "HISTORY\n1. New section filed {year}-0{month}-1{day}; operative {year}-0{month}-2{day}.\n"
+    "This database is current through {year} Register 10, March {day}, {year}.\n"
+    "[Currentness]({url})\n"
+    "[Back to top](#co_document)\n"
+    "© 2026 Thomson Reuters. No claim to original U.S. Government Works.\n"
+)
+
+
+def _guid(rng):
+    return "I" + "".join(rng.choice("0123456789ABCDEF") for _ in range(32))
+
+
+def _paragraph(rng, label, section_numbers):
+    sentence = " ".join([
+        rng.choice(BOILERPLATE),
+        rng.choice(CLAUSES).format(kw=rng.choice(KEYWORDS)),
+    ])
+    if rng.random() < 0.3:
+        sentence += f", as specified in section {rng.choice(section_numbers)}"
+    return f"({label}) {sentence}."
+
+
+def generate(sections, seed=0):
+    """Yield `sections` crawled-page records, deterministically for a seed."""
+    rng = random.Random(seed)
+    section_numbers = [f"{1000 + i}" for i in range(max(sections, 1))]
+
+    for i in range(sections):
+        title_number, title_name = TITLES[i * len(TITLES) // max(sections, 1)]
+        division = 1 + (i // 500) % 9
+        chapter = 1 + (i // 50) % 20
+        article = 1 + (i // 10) % 10
+        number = section_numbers[i]
+        name = f"{rng.choice(SUBJECTS)}."
+
+        url = URL_TEMPLATE.format(guid=_guid(rng))
+        paragraphs = "\n".join(
+            _paragraph(rng, label, section_numbers)
+            for label in "abcdefgh"[:rng.randint(2, 8)]
+        )
+
+        markdown = (
+            NAV.format(url=url, parent=_guid(rng))
+            + f"# § {number}. {name}\n"
+            + f"  * {title_number} CA ADC § {number}\n"
+            + "  * Barclays Official California Code of Regulations\n\n\n"
+            + "Barclays California Code of Regulations \n"
+            + f"Title {title_number}. {title_name}\n"
+            + f"Division {division}. {rng.choice(SUBJECTS)}\n"
+            + f"Chapter {chapter}. {rng.choice(SUBJECTS)}\n"
+            + f"Article {article}. {rng.choice(SUBJECTS)}\n"
+            + f"{title_number} CCR § {number}\n"
+            + f"**§ {number}. {name}**\n"
+            + paragraphs
+            + FOOTER.format(url=url, auth=rng.randint(100, 999), ref=rng.randint(100, 999),
+                            year=rng.randint(2000, 2025), month=rng.randint(1, 9),
+                            day=rng.randint(0, 9))
+        )
+
+        yield {"url": url, "markdown": markdown}
+
+
+def write(path, sections, seed=0):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for record in generate(sections, seed):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sections", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="data/synthetic_sections.jsonl")
+    args = parser.parse_args()
+
+    write(args.output, args.sections, args.seed)
+    print(f"🧪 {args.sections} synthetic sections → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
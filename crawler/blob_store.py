@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer only
+    fcntl = None
+
+# --------------------------------------------------
+# Content-addressed blob store for raw page bodies
+#
+# Bodies are zlib-compressed and appended to a single pack file; an
+# append-only index of fixed-width entries maps sha256 -> (offset,
+# compressed length, raw length). Identical bodies hash the same and are
+# stored once. Reads slice a memory map of the pack, so the compressed
+# bytes are handed to zlib without being copied.
+#
+# JSONL records keep "<field>_hash" instead of the inline "<field>";
+# resolve() returns the body either way.
+#
+# Several processes may append at once (crawl_queue.py next to
+# crawl_section_pages.py): each append and its index entry happen under
+# an exclusive flock on the index file, and the offset is taken from the
+# pack's size inside that lock. Readers pick up other processes' entries
+# by re-reading the index tail on a miss.
+# --------------------------------------------------
+
+BLOB_DIR = Path("data/blobs")
+PACK_NAME = "blobs.pack"
+INDEX_NAME = "blobs.idx"
+
+BODY_FIELDS = ("html", "markdown")
+
+# digest (32 bytes) | offset (u64) | compressed length (u32) | raw length (u32)
+INDEX_ENTRY = struct.Struct("<32sQII")
+
+COMPRESS_LEVEL = 6
+
+
+def blob_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, root=BLOB_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.pack_path = self.root / PACK_NAME
+        self.index_path = self.root / INDEX_NAME
+
+        self.pack_path.touch(exist_ok=True)
+        self.index_path.touch(exist_ok=True)
+
+        self.index = {}
+        self._index_read = 0
+        self._load_index()
+
+        self._pack = None
+        self._index_out = None
+        self._map = None
+        self._map_size = 0
+
+    def _load_index(self):
+        """Read index entries appended since the last call."""
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_read)
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size  # ignore torn tail
+        for digest, offset, length, size in INDEX_ENTRY.iter_unpack(data[:usable]):
+            self.index[digest] = (offset, length, size)
+        self._index_read += usable
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, key):
+        return bytes.fromhex(key) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._pack is not None:
+            self._pack.close()
+            self._index_out.close()
+            self._pack = self._index_out = None
+
+    def put(self, text):
+        """Store text (if new) and return its hex sha256 key."""
+        raw = text.encode("utf-8")
+        key = hashlib.sha256(raw).hexdigest()
+        digest = bytes.fromhex(key)
+
+        if digest in self.index:
+            return key
+
+        if self._pack is None:
+            self._pack = open(self.pack_path, "ab")
+            self._index_out = open(self.index_path, "ab")
+
+        payload = zlib.compress(raw, COMPRESS_LEVEL)
+
+        if fcntl is not None:
+            fcntl.flock(self._index_out.fileno(), fcntl.LOCK_EX)
+        try:
+            # Inside the lock nobody else can grow the pack
+            offset = os.fstat(self._pack.fileno()).st_size
+            self._pack.write(payload)
+            self._pack.flush()
+
+            # Pack bytes land before the index entry that points at them
+            self._index_out.write(INDEX_ENTRY.pack(digest, offset, len(payload), len(raw)))
+            self._index_out.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._index_out.fileno(), fcntl.LOCK_UN)
+
+        self.index[digest] = (offset, len(payload), len(raw))
+        return key
+
+    def view(self, key):
+        """Zero-copy memoryview of the compressed bytes for key."""
+        digest = bytes.fromhex(key)
+        if digest not in self.index:
+            # Possibly written by another process since we loaded
+            self._load_index()
+        offset, length, _ = self.index[digest]
+
+        if offset + length > self._map_size:
+            if self._map is not None:
+                self._map.close()
+            with open(self.pack_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = len(self._map)
+
+        return memoryview(self._map)[offset:offset + length]
+
+    def get(self, key):
+        with self.view(key) as buf:
+            return zlib.decompress(buf).decode("utf-8")
+
+    def size(self, key):
+        return self.index[bytes.fromhex(key)][2]
+
+    def stats(self):
+        stored = sum(length for _, length, _ in self.index.values())
+        raw = sum(size for _, _, size in self.index.values())
+        return {"blobs": len(self.index), "raw_bytes": raw, "stored_bytes": stored}
+
+
+_default_store = None
+
+
+def default_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = BlobStore()
+    return _default_store
+
+
+def resolve(record, field, store=None):
+    """Body for field, whether inline or stored by hash; '' if absent."""
+    if record.get(field) is not None:
+        return record[field]
+
+    key = record.get(f"{field}_hash")
+    if not key:
+        return ""
+    return (store or default_store()).get(key)
+
+
+def externalize(record, store, fields=BODY_FIELDS):
+    """Move inline bodies into the store, leaving hashes behind."""
+    for field in fields:
+        body = record.pop(field, None)
+        if body is not None:
+            record[f"{field}_hash"] = store.put(body)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move inline html/markdown bodies of JSONL files into the blob store"
+    )
+    parser.add_argument("files", nargs="+", type=Path)
+    args = parser.parse_args()
+
+    with BlobStore() as store:
+        for path in args.files:
+            before = path.stat().st_size
+            tmp = path.with_suffix(".tmp")
+
+            with path.open("r", encoding="utf-8") as f_in, \
+                 tmp.open("w", encoding="utf-8") as f_out:
+                for line in f_in:
+                    if not line.strip():
+                        continue
+                    record = externalize(json.loads(line), store)
+                    f_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            tmp.replace(path)
+            print(f"✅ {path}: {before:,} → {path.stat().st_size:,} bytes")
+
+        stats = store.stats()
+        print(f"📦 Blob store: {stats['blobs']} unique bodies, "
+              f"{stats['raw_bytes']:,} raw → {stats['stored_bytes']:,} bytes on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,74 @@
+import argparse
+import itertools
 import json
-import re
 from pathlib import Path
 
+import metrics
+from blob_store import resolve
+from clean_sections import OUTPUT_FILE as SECTIONS_FILE
+from enrich_sections import build_citation
+from hierarchy import HIERARCHY_FILE, HierarchyTree, browse_path
+from parallel_parse import default_workers, parallel_map
+from section_extractor import extract
+
 INPUT_FILE = "data/all_discovered_urls.jsonl"
 OUTPUT_FILE = "data/ccr_sections_structured.jsonl"
 
-def extract_section_info(markdown: str):
-    section = "Unknown"
-    section_name = "Unknown"
+def structure_record(line):
+    record = json.loads(line)
+
+    markdown = resolve(record, "markdown")
+    url = record.get("url", "")
+
+    if not markdown:
+        return None
 
-    # Try to find section number like §12345
-    match = re.search(r"§\s*\d+[.\d]*", markdown)
-    if match:
-        section = match.group().strip()
+    fields = extract(markdown)
 
-    # Try to find a heading line
-    lines = markdown.splitlines()
-    for line in lines[:10]:
-        if section in line:
-            section_name = line.strip()
-            break
+    # Browse pages carry a breadcrumb trail, documents a preamble
+    path = browse_path(markdown) or fields["hierarchy"]
+    numbers = {level: number for level, number, _ in path}
 
-    return section, section_name
+    return {
+        "title": numbers.get("title"),
+        "division": numbers.get("division"),
+        "chapter": numbers.get("chapter"),
+        "section": f"§ {fields['section_number']}" if fields["section_number"] else "Unknown",
+        "section_name": fields["section_name"] or "Unknown",
+        "hierarchy": [[level, number, name] for level, number, name in path],
+        "url": url,
+        "markdown": markdown
+    }
+
+
+def section_paths(path=SECTIONS_FILE):
+    """
+    (path, citation) per cleaned section with a preamble. Pages without
+    a section number (Refs & Annos) still contribute their levels.
+    """
+    if not Path(path).exists():
+        return
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            hierarchy = [tuple(level) for level in record.get("hierarchy") or []]
+            if not hierarchy:
+                continue
+            if not record.get("section_number"):
+                yield hierarchy, None
+                continue
+            leaf = ("section", record["section_number"], record.get("section_name") or "")
+            yield hierarchy + [leaf], build_citation(record)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the CCR hierarchy tree")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
     input_path = Path(INPUT_FILE)
     output_path = Path(OUTPUT_FILE)
 
@@ -33,35 +77,29 @@ def main():
         return
 
     count = 0
+    browse_paths = []
 
-    with input_path.open("r", encoding="utf-8") as infile, \
+    with metrics.span("parse", script="build_ccr_hierarchy"), \
+         input_path.open("r", encoding="utf-8") as infile, \
          output_path.open("w", encoding="utf-8") as outfile:
 
-        for line in infile:
-            record = json.loads(line)
-
-            markdown = record.get("markdown", "")
-            url = record.get("url", "")
-
-            if not markdown:
+        for structured in parallel_map(structure_record, infile, args.workers):
+            if structured is None:
                 continue
 
-            section, section_name = extract_section_info(markdown)
-
-            structured = {
-                "title": "Unknown",
-                "division": "Unknown",
-                "chapter": "Unknown",
-                "section": section,
-                "section_name": section_name,
-                "url": url,
-                "markdown": markdown
-            }
-
+            if structured["hierarchy"]:
+                browse_paths.append(([tuple(level) for level in structured["hierarchy"]], None))
             outfile.write(json.dumps(structured, ensure_ascii=False) + "\n")
             count += 1
 
-    print(f"✅ Structured CCR sections saved: {count}")
+    metrics.inc("records_total", count, stage="parse")
+    print(f"✅ Structured CCR pages saved: {count}")
+
+    # Browse pages give the skeleton, cleaned sections the leaves
+    tree = HierarchyTree.build(itertools.chain(browse_paths, section_paths()))
+    tree.save(HIERARCHY_FILE)
+    print(f"🌳 Hierarchy tree: {len(tree)} nodes, {len(tree.by_citation)} sections "
+          f"→ {HIERARCHY_FILE}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+import argparse
+import json
+import mmap
+import re
+import struct
+from array import array
+from pathlib import Path
+
+import metrics
+from clean_sections import OUTPUT_FILE as SECTIONS_FILE
+from enrich_sections import build_citation
+from section_extractor import record_body
+
+# --------------------------------------------------
+# Citation cross-reference graph
+#
+# Every cleaned section's text is scanned for in-text references to other
+# CCR sections ("section 4020.3", "sections 4020.4, 4020.5, and 4020.6",
+# "§ 1234(a)", "section 100, title 1"). References to statutes ("Section
+# 15330, Government Code", "Section 411 of the ...") and to sections not
+# in the corpus are dropped.
+#
+# The graph is stored in CSR form, both directions, in one binary file:
+#
+#   header "<4sIII"   magic, version, node count n, edge count m
+#   out_indptr  n+1 × uint32   out_indices  m × uint32   (i cites …)
+#   in_indptr   n+1 × uint32   in_indices   m × uint32   (… cites i)
+#   node citations, JSON
+#
+# Neighbours of node i are indices[indptr[i]:indptr[i + 1]]: one slice of
+# a memoryview over the memory-mapped file, no per-edge objects.
+# --------------------------------------------------
+
+GRAPH_FILE = Path("data/citation_graph.bin")
+
+MAGIC = b"CCRG"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")
+
+NUMBER = r"\d+(?:\.\d+)*[a-z]?(?:\([a-zA-Z0-9]+\))*"
+REF_PATTERN = re.compile(
+    rf"(?:\b[Ss]ections?|§§?)\s*({NUMBER}(?:\s*(?:,|\band\b|\bor\b|\bthrough\b|\bto\b|-|–)\s*"
+    rf"(?:and\s+|or\s+)?{NUMBER})*)(?=([^\n]{{0,40}}))"
+)
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)*[a-z]?")
+# "(a)(1)" subdivision markers, dropped before reading the section numbers
+SUBDIVISION = re.compile(r"\([a-zA-Z0-9]+\)")
+TITLE_TAIL = re.compile(r"^,?\s*(?:of\s+)?[Tt]itle\s+(\d+)\b")
+STATUTE_TAIL = re.compile(
+    r"^(?:,\s*|\s+of\s+(?:the\s+)?|\s+)(?:[A-Z][\w.&'-]*\s+){0,6}(?:Code|Act|U\.S\.C)\b"
+    r"|^\s+of\s+the\b"
+)
+
+
+def extract_references(body, title_number):
+    """Citations referenced in a section's body, in order, deduplicated."""
+    refs = []
+    for numbers, tail in REF_PATTERN.findall(body):
+        title = title_number
+        match = TITLE_TAIL.match(tail)
+        if match:
+            title = match.group(1)
+        elif STATUTE_TAIL.match(tail):
+            continue
+
+        for number in NUMBER_PATTERN.findall(SUBDIVISION.sub("", numbers)):
+            refs.append(f"{title} CCR § {number}")
+
+    return list(dict.fromkeys(refs))
+
+
+def _csr(adjacency, n):
+    indptr = array("I", [0])
+    indices = array("I")
+    for i in range(n):
+        indices.extend(sorted(adjacency[i]))
+        indptr.append(len(indices))
+    return indptr, indices
+
+
+class CitationGraph:
+    def __init__(self, citations, out_indptr, out_indices, in_indptr, in_indices):
+        self.citations = citations
+        self.node = {c: i for i, c in enumerate(citations)}
+        self.out_indptr = out_indptr
+        self.out_indices = out_indices
+        self.in_indptr = in_indptr
+        self.in_indices = in_indices
+
+    def __len__(self):
+        return len(self.citations)
+
+    @property
+    def edges(self):
+        return len(self.out_indices)
+
+    @classmethod
+    def build(cls, sections):
+        """sections: iterable of (citation, [referenced citations])."""
+        sections = list(sections)
+        citations = list(dict.fromkeys(citation for citation, _ in sections))
+        node = {c: i for i, c in enumerate(citations)}
+
+        cites = [set() for _ in citations]
+        cited_by = [set() for _ in citations]
+        for citation, refs in sections:
+            i = node[citation]
+            for ref in refs:
+                j = node.get(ref)
+                if j is not None and j != i:
+                    cites[i].add(j)
+                    cited_by[j].add(i)
+
+        return cls(citations, *_csr(cites, len(citations)), *_csr(cited_by, len(citations)))
+
+    # ---------- persistence ----------
+
+    def save(self, path=GRAPH_FILE):
+        path = Path(path)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self), self.edges))
+            for column in (self.out_indptr, self.out_indices, self.in_indptr, self.in_indices):
+                f.write(column.tobytes())
+            f.write(json.dumps(self.citations, ensure_ascii=False).encode("utf-8"))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path=GRAPH_FILE):
+        with open(path, "rb") as f:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, version, n, m = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} citation graph")
+
+        columns = []
+        offset = HEADER.size
+        for length in (n + 1, m, n + 1, m):
+            size = length * array("I").itemsize
+            columns.append(data[offset:offset + size].cast("I"))
+            offset += size
+
+        citations = json.loads(bytes(data[offset:]).decode("utf-8"))
+        return cls(citations, *columns)
+
+    # ---------- queries ----------
+
+    def _neighbors(self, indptr, indices, citation):
+        i = self.node.get(citation)
+        if i is None:
+            return []
+        return [self.citations[j] for j in indices[indptr[i]:indptr[i + 1]]]
+
+    def cites(self, citation):
+        """Sections this one references."""
+        return self._neighbors(self.out_indptr, self.out_indices, citation)
+
+    def cited_by(self, citation):
+        """Sections that reference this one."""
+        return self._neighbors(self.in_indptr, self.in_indices, citation)
+
+
+def load_graph(path=GRAPH_FILE):
+    """The saved graph, or None before citation_graph.py has run."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return CitationGraph.load(path)
+
+
+def iter_sections(path=SECTIONS_FILE):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if not record.get("section_number"):
+                continue
+            yield build_citation(record), extract_references(
+                record_body(record), record.get("title_number")
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the CCR citation graph")
+    parser.add_argument("--input", default=str(SECTIONS_FILE))
+    parser.add_argument("--output", default=str(GRAPH_FILE))
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    with metrics.span("parse", script="citation_graph"):
+        graph = CitationGraph.build(iter_sections(args.input))
+    graph.save(args.output)
+
+    metrics.inc("records_total", len(graph), stage="parse")
+    print(f"🕸️ Citation graph: {len(graph)} sections, {graph.edges} references → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
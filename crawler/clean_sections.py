@@ -1,63 +1,101 @@
+import argparse
 import json
-import re
 from pathlib import Path
 from datetime import datetime
 
+from blob_store import resolve
+import metrics
+from incremental import MANIFEST_FILE, load_manifest, merge_delta
+from parallel_parse import default_workers, parallel_map
+from section_extractor import extract
+import section_store
+from section_store import SectionStore
+
 INPUT_FILE = Path("data/sections_content.jsonl")
 OUTPUT_FILE = Path("data/ccr_sections_clean.jsonl")
 
-SECTION_REGEX = re.compile(
-    r"§\s*(\d+(?:\.\d+)*)\.?\s*([A-Z][^\n]+)",
-    re.IGNORECASE
-)
+def clean_record(raw):
+    markdown = resolve(raw, "markdown")
 
-TITLE_REGEX = re.compile(
-    r"Title\s+(\d+)\.\s*([A-Za-z &]+)"
-)
+    # Title / Division / Chapter / Article preamble, section heading and
+    # body, all from one scan of the document (see section_extractor.py)
+    fields = extract(markdown)
 
-def extract_section(markdown: str):
-    """
-    Extract section number and name from markdown.
-    """
-    match = SECTION_REGEX.search(markdown)
-    if match:
-        return match.group(1), match.group(2).strip()
-    return None, None
+    return {
+        "title_number": fields["title_number"],
+        "title_name": fields["title_name"],
+        "division": fields["division"],
+        "chapter": fields["chapter"],
+        "article": fields["article"],
+        "hierarchy": [[level, number, name] for level, number, name in fields["hierarchy"]],
+        "section_number": fields["section_number"],
+        "section_name": fields["section_name"],
+        "source_url": raw.get("url"),
+        "content_markdown": markdown,
+        "body": fields["body"],
+        "retrieved_at": datetime.utcnow().isoformat()
+    }
 
-def extract_title(markdown: str):
-    match = TITLE_REGEX.search(markdown)
-    if match:
-        return match.group(1), match.group(2).strip()
-    return None, None
+def iter_raw(delta=None):
+    with open(INPUT_FILE, encoding="utf-8", errors="ignore") as f_in:
+        for line in f_in:
+            raw = json.loads(line)
+            if delta is None or raw.get("url") in delta:
+                yield raw
 
-def main():
-    count = 0
+def clean_into_store(args):
+    """--store: write cleaned sections to the SQLite store, not the JSONL."""
+    with SectionStore(args.store) as store:
+        if args.manifest:
+            delta, removed = load_manifest(args.manifest)
+            with metrics.span("clean"):
+                store.delete(removed)
+                count = store.write(parallel_map(clean_record, iter_raw(delta), args.workers))
+            metrics.inc("records_total", count, stage="clean")
+            print(f"✅ Canonical CCR sections updated in {args.store} ({count} cleaned, "
+                  f"{len(store) - count} unchanged, {len(removed)} removed)")
+            return
 
-    with open(INPUT_FILE, encoding="utf-8", errors="ignore") as f_in, \
-         open(OUTPUT_FILE, "w", encoding="utf-8") as f_out:
+        with metrics.span("clean"):
+            count = store.write(parallel_map(clean_record, iter_raw(), args.workers),
+                                replace=True)
+        metrics.inc("records_total", count, stage="clean")
+        print(f"✅ Canonical CCR sections saved to {args.store} ({count})")
 
-        for line in f_in:
-            raw = json.loads(line)
-            markdown = raw.get("markdown", "")
+def main():
+    parser = argparse.ArgumentParser(description="Clean crawled CCR sections")
+    parser.add_argument("--manifest", nargs="?", const=str(MANIFEST_FILE),
+                        help="only reprocess pages added/changed in a recrawl manifest")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="parser processes (1 = single-process)")
+    section_store.add_arguments(parser)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
 
-            title_number, title_name = extract_title(markdown)
-            section_number, section_name = extract_section(markdown)
+    if args.store:
+        clean_into_store(args)
+        return
 
-            record = {
-                "title_number": title_number,
-                "title_name": title_name,
-                "division": None,
-                "chapter": None,
-                "article": None,
-                "section_number": section_number,
-                "section_name": section_name,
-                "source_url": raw.get("url"),
-                "content_markdown": markdown,
-                "retrieved_at": datetime.utcnow().isoformat()
-            }
+    if args.manifest:
+        delta, removed = load_manifest(args.manifest)
+        with metrics.span("clean"):
+            kept, count = merge_delta(
+                OUTPUT_FILE, OUTPUT_FILE, "source_url", delta, removed,
+                parallel_map(clean_record, iter_raw(delta), args.workers)
+            )
+        metrics.inc("records_total", count, stage="clean")
+        print(f"✅ Canonical CCR sections updated ({count} cleaned, "
+              f"{kept} unchanged, {len(removed)} removed)")
+        return
+
+    count = 0
 
+    with metrics.span("clean"), open(OUTPUT_FILE, "w", encoding="utf-8") as f_out:
+        for record in parallel_map(clean_record, iter_raw(), args.workers):
             f_out.write(json.dumps(record, ensure_ascii=False) + "\n")
             count += 1
+    metrics.inc("records_total", count, stage="clean")
 
     print(f"✅ Canonical CCR sections saved ({count})")
 
@@ -1,10 +1,16 @@
+import argparse
 import asyncio
 import json
 from datetime import datetime
 from pathlib import Path
 
 from crawl4ai import AsyncWebCrawler
-from bs4 import BeautifulSoup
+
+from blob_store import BlobStore
+import metrics
+from frontier import DONE, FAILED, Frontier, write_coverage_report
+from parallel_parse import iter_hrefs
+from url_canon import canonicalize
 
 START_URLS = [
     "https://govt.westlaw.com/calregs"
@@ -13,60 +19,103 @@ START_URLS = [
 OUTPUT_FILE = Path("data/all_discovered_urls.jsonl")
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-visited = set()
+FRONTIER_DB = Path("data/crawl_queue.db")
+# Own report files: discover_section_links.py writes the unprefixed ones
+CRAWLED_FILE = Path("data/crawl_queue_crawled_urls.txt")
+FAILED_FILE = Path("data/crawl_queue_failed_urls.txt")
+COVERAGE_FILE = Path("data/crawl_queue_coverage_report.txt")
+
 MAX_PAGES = 50   # keep reasonable for internship
 
 
 def extract_links(html: str):
-    soup = BeautifulSoup(html, "html.parser")
     links = set()
 
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-
-        # only CCR links
-        if href.startswith("/calregs"):
-            links.add("https://govt.westlaw.com" + href)
+    for href in iter_hrefs(html):
+        # only CCR links, one canonical form per page
+        link = canonicalize(href)
+        if link is not None:
+            links.add(link)
 
     return links
 
 
+def written_urls(path=OUTPUT_FILE):
+    """URLs that already have a record, so a page re-queued after a crash isn't written twice."""
+    if not path.exists():
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {json.loads(line).get("url") for line in f if line.strip()}
+
+
 async def main():
-    async with AsyncWebCrawler(verbose=True) as crawler:
-        queue = list(START_URLS)
-
-        while queue and len(visited) < MAX_PAGES:
-            url = queue.pop(0)
-            if url in visited:
-                continue
-
-            print(f"\nCrawling: {url}")
-            visited.add(url)
-
-            try:
-                result = await crawler.arun(url=url)
-            except Exception as e:
-                print(f"❌ Failed: {e}")
-                continue
-
-            record = {
-                "url": url,
-                "crawled_at": datetime.utcnow().isoformat(),
-                "html": result.html or "",
-                "markdown": result.markdown or "",
-            }
-
-            with open(OUTPUT_FILE, "a", encoding="utf-8") as f:
-                f.write(json.dumps(record) + "\n")
-
-            # 🔥 MANUAL LINK EXTRACTION
-            new_links = extract_links(record["html"])
-            for link in new_links:
-                if link not in visited:
-                    queue.append(link)
+    parser = argparse.ArgumentParser(description="Breadth-first CCR crawl")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-queue URLs that failed in earlier runs")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    with Frontier(FRONTIER_DB) as frontier:
+        frontier.add_many(START_URLS)
+        if args.retry_failed:
+            print(f"🔁 Re-queued {frontier.retry_failed()} failed URLs")
+
+        print(f"📂 Resuming frontier: {frontier.stats()}")
+
+        visited = frontier.count(DONE) + frontier.count(FAILED)
+        written = written_urls()
+
+        store = BlobStore()
+
+        async with AsyncWebCrawler(verbose=True) as crawler:
+            while visited < MAX_PAGES:
+                item = frontier.next()
+                if item is None:
+                    break
+                url, depth = item
+                visited += 1
+
+                print(f"\nCrawling: {url}")
+
+                try:
+                    with metrics.span("fetch"):
+                        result = await crawler.arun(url=url)
+                except Exception as e:
+                    metrics.inc("fetch_total", outcome="failed")
+                    print(f"❌ Failed: {e}")
+                    frontier.mark_failed(url, e)
+                    continue
+
+                metrics.inc("fetch_total", outcome="ok")
+                html = result.html or ""
+
+                # The record is appended before mark_done; a crash in between
+                # re-queues the URL, so skip pages whose record is already out
+                if url not in written:
+                    record = {
+                        "url": url,
+                        "crawled_at": datetime.utcnow().isoformat(),
+                        "html_hash": store.put(html),
+                        "markdown_hash": store.put(result.markdown or ""),
+                    }
+
+                    with open(OUTPUT_FILE, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+                    written.add(url)
+
+                # 🔥 MANUAL LINK EXTRACTION
+                with metrics.span("parse"):
+                    links = extract_links(html)
+                frontier.add_many(links, depth + 1)
+                frontier.mark_done(url)
+
+        store.close()
+        frontier.export(CRAWLED_FILE, FAILED_FILE)
+        write_coverage_report(frontier, COVERAGE_FILE, failed_path=FAILED_FILE)
 
         print("\nCrawl finished")
-        print(f"Visited {len(visited)} pages")
+        print(f"Visited {frontier.count(DONE)} pages ({frontier.count(FAILED)} failed)")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,28 @@
+import argparse
 import asyncio
 import json
+import time
 from pathlib import Path
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
 
+from blob_store import BlobStore
+from fetch_pool import (
+    DEFAULT_BURST,
+    DEFAULT_RATE,
+    DEFAULT_RETRIES,
+    DEFAULT_WORKERS,
+    FetchError,
+    run_pool,
+)
+from incremental import (
+    load_state,
+    probe,
+    save_state,
+    state_entry,
+    write_manifest,
+)
+import metrics
+
 SECTION_URLS_FILE = "data/section_urls.txt"
 OUTPUT_FILE = "data/sections_content.jsonl"
 
@@ -14,41 +34,147 @@ def load_valid_urls(path):
             urls.append(line)
     return urls
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawl CCR section pages")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="concurrent fetch workers")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="requests per second per host (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST,
+                        help="token bucket burst size per host")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="attempts per URL before giving up")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write pages as they complete instead of in input order")
+    parser.add_argument("--incremental", action="store_true",
+                        help="send conditional requests and keep unchanged pages")
+    parser.add_argument("--inline", action="store_true",
+                        help="inline html/markdown in the JSONL instead of the blob store")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    if args.retries < 1:
+        parser.error("--retries counts attempts and must be at least 1")
+    return args
+
 async def main():
+    args = parse_args()
+    metrics.setup_from_args(args)
+
     urls = load_valid_urls(SECTION_URLS_FILE)
     print(f"🔍 Valid section URLs: {len(urls)}")
     print("First 5 URLs:")
     for u in urls[:5]:
         print(" -", u)
 
-    crawler = AsyncWebCrawler(max_concurrency=1)
     config = CrawlerRunConfig(wait_until="networkidle")
 
+    state = load_state()
+    new_state = {}
+    added, changed = set(), set()
+    unchanged = 0
+
+    # Previous records by URL, reused verbatim for pages that did not change
+    previous = {}
+    if args.incremental and Path(OUTPUT_FILE).exists():
+        with open(OUTPUT_FILE, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    previous[json.loads(line)["url"]] = line.rstrip("\n") + "\n"
+
+    store = BlobStore()
     success = 0
+    started = time.monotonic()
+
+    async with AsyncWebCrawler() as crawler:
+
+        async def fetch(url):
+            validators = {}
+            entry = state.get(url)
+
+            if args.incremental and entry and entry["record_url"] in previous:
+                not_modified, validators = await asyncio.to_thread(probe, url, entry)
+                if not_modified:
+                    return None, validators
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
-        for url in urls:
-            try:
-                results = await crawler.arun(url, config=config)
-                page = results[0]
+            results = await crawler.arun(url, config=config)
+            page = results[0]
+            if not page.success:
+                raise FetchError(page.error_message or "crawl failed")
+            return page, validators
 
-                if not page.success:
-                    print(f"⚠️ Failed: {url}")
+        with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
+            async for url, result, error in run_pool(
+                urls,
+                fetch,
+                workers=args.workers,
+                rate=args.rate,
+                burst=args.burst,
+                retries=args.retries,
+                ordered=not args.unordered,
+            ):
+                entry = state.get(url)
+
+                if error is not None:
+                    metrics.inc("pages_total", stage="fetch", outcome="failed")
+                    print(f"❌ Error crawling {url}: {error}")
+                    # Keep the last good copy rather than reporting it removed
+                    if entry and entry["record_url"] in previous:
+                        out.write(previous[entry["record_url"]])
+                        new_state[url] = entry
+                    continue
+
+                page, validators = result
+
+                if page is None:
+                    out.write(previous[entry["record_url"]])
+                    new_state[url] = entry
+                    unchanged += 1
+                    metrics.inc("pages_total", stage="fetch", outcome="not_modified")
+                    print(f"⏭️ Not modified: {url}")
                     continue
 
-                record = {
-                    "url": page.url,
-                    "html": page.html,
-                    "markdown": page.markdown
-                }
+                if args.inline:
+                    record = {
+                        "url": page.url,
+                        "html": page.html,
+                        "markdown": page.markdown
+                    }
+                else:
+                    record = {
+                        "url": page.url,
+                        "html_hash": store.put(page.html or ""),
+                        "markdown_hash": store.put(page.markdown or ""),
+                    }
 
                 out.write(json.dumps(record, ensure_ascii=False) + "\n")
                 success += 1
+                metrics.inc("pages_total", stage="fetch", outcome="ok")
+
+                new_state[url] = state_entry(page.url, page.markdown, validators)
+                if entry is None:
+                    added.add(page.url)
+                elif entry["content_hash"] != new_state[url]["content_hash"]:
+                    changed.add(page.url)
+                else:
+                    unchanged += 1
                 print(f"✅ Crawled: {url}")
 
-            except Exception as e:
-                print(f"❌ Error crawling {url}: {e}")
+    store.close()
+
+    current = set(urls)
+    removed = {
+        entry["record_url"] for url, entry in state.items()
+        if url not in current
+    }
+
+    save_state(new_state)
+    write_manifest(added, changed, removed, unchanged)
+    print(f"🧾 Manifest: {len(added)} added, {len(changed)} changed, "
+          f"{len(removed)} removed, {unchanged} unchanged")
 
+    elapsed = time.monotonic() - started
+    rate = success / elapsed * 60 if elapsed else 0.0
     print(f"\n🎉 Finished. Successfully crawled {success} section pages.")
+    print(f"⏱️ {elapsed:.1f}s elapsed, {rate:.1f} pages/min with {args.workers} workers")
 if __name__ == "__main__":
     asyncio.run(main())
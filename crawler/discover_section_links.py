@@ -1,66 +1,103 @@
+import argparse
 import asyncio
-import re
 from pathlib import Path
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
-from bs4 import BeautifulSoup
+
+import metrics
+from frontier import Frontier, write_coverage_report
+from parallel_parse import iter_hrefs
+from url_canon import SeenSet, canonicalize, document_guid
 
 START_URL = "https://govt.westlaw.com/calregs/Browse/Home/California/CaliforniaCodeofRegulations"
 OUTPUT_FILE = Path("data/section_urls.txt")
+FRONTIER_DB = Path("data/discovery_frontier.db")
+CRAWLED_FILE = Path("data/crawled_urls.txt")
+FAILED_FILE = Path("data/failed_urls.txt")
+COVERAGE_FILE = Path("data/coverage_report.txt")
 MAX_SECTIONS = 200
 
-SECTION_PATTERN = re.compile(r"/calregs/Document/")
-
 async def main():
+    parser = argparse.ArgumentParser(description="Discover CCR section URLs")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-queue browse pages that failed in earlier runs")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
     crawler = AsyncWebCrawler()
     config = CrawlerRunConfig(
         wait_until="networkidle",
         page_timeout=30000
     )
-                                                                                                                                      
-    discovered = set()
-    visited = set()
-    to_visit = [START_URL]
-
-    while to_visit and len(discovered) < MAX_SECTIONS:
-        url = to_visit.pop(0)
-        if url in visited:
-            continue
-        visited.add(url)
+
+    # Browse pages to visit, and the section pages found on them
+    to_visit = Frontier(FRONTIER_DB, name="browse_pages")
+    discovered = Frontier(FRONTIER_DB, name="section_pages")
+
+    to_visit.add(canonicalize(START_URL))
+    if args.retry_failed:
+        print(f"🔁 Re-queued {to_visit.retry_failed()} failed browse pages")
+
+    # In-memory pre-check: unseen links skip the SQLite lookup, and
+    # fingerprint hits are confirmed against the frontier's UNIQUE url
+    seen_browse = SeenSet(to_visit.urls(), exact=to_visit.__contains__)
+    seen_sections = SeenSet(discovered.urls(), exact=discovered.__contains__)
+
+    found = len(seen_sections)
+    print(f"📂 Resuming: {found} sections known, {to_visit.stats()}")
+
+    while found < MAX_SECTIONS:
+        item = to_visit.next()
+        if item is None:
+            break
+        url, depth = item
 
         try:
-            result = await crawler.arun(url, config=config)
+            with metrics.span("fetch"):
+                result = await crawler.arun(url, config=config)
         except Exception as e:
+            metrics.inc("fetch_total", outcome="failed")
             print(f"❌ Failed: {url} → {e}")
+            to_visit.mark_failed(url, e)
             continue
 
         if not result or not result.html:
+            metrics.inc("fetch_total", outcome="empty")
+            to_visit.mark_failed(url, "empty response")
             continue
 
-        soup = BeautifulSoup(result.html, "html.parser")
-
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-
-            # Normalize relative URLs
-            if href.startswith("/"):
-                href = "https://govt.westlaw.com" + href
+        metrics.inc("fetch_total", outcome="ok")
+        for href in iter_hrefs(result.html):
+            # One canonical URL per document / browse page
+            href = canonicalize(href, base=url)
+            if href is None:
+                continue
 
             # Section pages
-            if SECTION_PATTERN.search(href):
-                discovered.add(href)
-                if len(discovered) >= MAX_SECTIONS:
-                    break
+            if document_guid(href):
+                if seen_sections.add(href):
+                    found += discovered.add(href, depth + 1)
+                    if found >= MAX_SECTIONS:
+                        break
 
             # Browse deeper
-            if "/Browse/" in href and href not in visited:
-                to_visit.append(href)
+            elif "/Browse/" in href and seen_browse.add(href):
+                to_visit.add(href, depth + 1)
+
+        to_visit.mark_done(url)
 
     OUTPUT_FILE.parent.mkdir(exist_ok=True)
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        for url in sorted(discovered):
+        for url in sorted(discovered.urls()):
             f.write(url + "\n")
 
-    print(f"✅ Discovered {len(discovered)} CCR section URLs")
+    to_visit.export(CRAWLED_FILE, FAILED_FILE)
+    write_coverage_report(to_visit, COVERAGE_FILE, discovered=found, failed_path=FAILED_FILE)
+
+    print(f"✅ Discovered {found} CCR section URLs")
+
+    to_visit.close()
+    discovered.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
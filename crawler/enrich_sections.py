@@ -1,7 +1,13 @@
+import argparse
 import json
 from pathlib import Path
 from datetime import datetime
 
+import metrics
+from incremental import MANIFEST_FILE, load_manifest, merge_delta
+import section_store
+from section_store import SectionStore
+
 INPUT_FILE = Path("data/ccr_sections_clean.jsonl")
 OUTPUT_FILE = Path("data/ccr_sections_enriched.jsonl")
 
@@ -34,21 +40,63 @@ def build_breadcrumb(record):
 
     return " → ".join(parts)
 
-def main():
-    enriched_count = 0
-
-    with INPUT_FILE.open("r", encoding="utf-8") as infile, \
-         OUTPUT_FILE.open("w", encoding="utf-8") as outfile:
+def enrich_record(record):
+    record["citation"] = build_citation(record)
+    record["breadcrumb_path"] = build_breadcrumb(record)
+    record["retrieved_at"] = datetime.utcnow().isoformat() + "Z"
+    return record
 
+def iter_clean(delta=None):
+    with INPUT_FILE.open("r", encoding="utf-8") as infile:
         for line in infile:
             record = json.loads(line)
+            if delta is None or record.get("source_url") in delta:
+                yield record
+
+def enrich_store(args):
+    """--store: enrich cleaned rows in place; only the enriched columns change."""
+    delta = load_manifest(args.manifest)[0] if args.manifest else None
 
-            record["citation"] = build_citation(record)
-            record["breadcrumb_path"] = build_breadcrumb(record)
-            record["retrieved_at"] = datetime.utcnow().isoformat() + "Z"
+    with SectionStore(args.store) as store:
+        with metrics.span("enrich"):
+            enriched = [enrich_record(record) for record in store.records(delta)]
+            enriched_count = store.update(enriched)
+        metrics.inc("records_total", enriched_count, stage="enrich")
+
+    print(f"✅ Enriched {enriched_count} CCR sections in {args.store}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Add citations and breadcrumbs")
+    parser.add_argument("--manifest", nargs="?", const=str(MANIFEST_FILE),
+                        help="only re-enrich sections added/changed in a recrawl manifest")
+    section_store.add_arguments(parser)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
+    if args.store:
+        enrich_store(args)
+        return
+
+    if args.manifest:
+        delta, removed = load_manifest(args.manifest)
+        with metrics.span("enrich"):
+            kept, enriched_count = merge_delta(
+                OUTPUT_FILE, OUTPUT_FILE, "source_url", delta, removed,
+                (enrich_record(record) for record in iter_clean(delta))
+            )
+        metrics.inc("records_total", enriched_count, stage="enrich")
+        print(f"✅ Enriched {enriched_count} changed CCR sections ({kept} unchanged)")
+        print(f"📁 Output saved to: {OUTPUT_FILE}")
+        return
+
+    enriched_count = 0
 
-            outfile.write(json.dumps(record, ensure_ascii=False) + "\n")
+    with metrics.span("enrich"), OUTPUT_FILE.open("w", encoding="utf-8") as outfile:
+        for record in iter_clean():
+            outfile.write(json.dumps(enrich_record(record), ensure_ascii=False) + "\n")
             enriched_count += 1
+    metrics.inc("records_total", enriched_count, stage="enrich")
 
     print(f"✅ Enriched {enriched_count} CCR sections")
     print(f"📁 Output saved to: {OUTPUT_FILE}")
@@ -1,30 +1,24 @@
 import json
-import re
 from pathlib import Path
 from datetime import datetime
 
 from crawl4ai import AsyncWebCrawler
 import asyncio
 
+from section_extractor import extract
+
 INPUT_FILE = Path("data/section_urls.txt")
 OUTPUT_FILE = Path("data/sections_content.jsonl")
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 
 def extract_section_data(markdown: str):
-    title_match = re.search(r"#\s*(Section\s+\d+[\w\.\-]*)", markdown, re.IGNORECASE)
-    section_title = title_match.group(1) if title_match else "Unknown Section"
-
-    # remove nav junk
-    text_lines = [
-        line.strip()
-        for line in markdown.splitlines()
-        if len(line.strip()) > 40
-    ]
-
-    section_text = "\n".join(text_lines)
+    # Body between the section heading and the credits: no nav junk
+    fields = extract(markdown)
+    number = fields["section_number"]
+    section_title = f"Section {number}" if number else "Unknown Section"
 
-    return section_title, section_text
+    return section_title, fields["body"]
 
 
 async def main():
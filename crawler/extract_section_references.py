@@ -1,46 +1,77 @@
-from bs4 import BeautifulSoup
+import argparse
 import json
 
+import metrics
+from blob_store import resolve
+from hierarchy import browse_path
+from parallel_parse import default_workers, iter_anchors, parallel_map
+
 INPUT_FILE = "data/all_discovered_urls.jsonl"
 OUTPUT_FILE = "data/section_references.jsonl"
 
 
 def extract_section_refs_from_html(html):
-    soup = BeautifulSoup(html, "html.parser")
     sections = []
 
-    for a in soup.find_all("a"):
-        text = a.get_text(strip=True)
+    for href, text in iter_anchors(html):
         if text.startswith("§"):
-            sections.append(text)
+            sections.append((text, href))
 
     return sections
 
 
+def page_type(record):
+    """
+    "article", "chapter", … for a browse page. crawl_queue.py records no
+    type, so it is read from the page's own breadcrumb heading.
+    """
+    if record.get("type"):
+        return record["type"]
+    path = browse_path(resolve(record, "markdown") or "")
+    return path[-1][0] if path else None
+
+
+def refs_for_record(record):
+    # Only Article / Chapter pages contain section lists
+    kind = page_type(record)
+    if kind not in ("article", "chapter"):
+        return record["url"], kind, []
+
+    html = resolve(record, "html")
+    if not html:
+        return record["url"], kind, []
+
+    return record["url"], kind, extract_section_refs_from_html(html)
+
+
+def iter_records():
+    with open(INPUT_FILE, "r", encoding="utf-8") as infile:
+        for line in infile:
+            yield json.loads(line)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Collect § links from article/chapter pages")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup_from_args(args)
+
     count = 0
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as infile, \
+    with metrics.span("parse", script="extract_section_references"), \
          open(OUTPUT_FILE, "w", encoding="utf-8") as outfile:
+        for url, kind, sections in parallel_map(refs_for_record, iter_records(), args.workers):
+            for sec, href in sections:
+                outfile.write(json.dumps({
+                    "parent_url": url,
+                    "parent_type": kind,
+                    "section_ref": sec,
+                    "section_url": href
+                }) + "\n")
+                count += 1
 
-        for line in infile:
-            record = json.loads(line)
-            url = record["url"]
-
-            # Only Article / Chapter pages contain section lists
-            if record["type"] in ("article", "chapter"):
-                html = record.get("html", "")
-                if not html:
-                    continue
-
-                sections = extract_section_refs_from_html(html)
-                for sec in sections:
-                    outfile.write(json.dumps({
-                        "parent_url": url,
-                        "section_ref": sec
-                    }) + "\n")
-                    count += 1
-
+    metrics.inc("records_total", count, stage="parse")
     print(f"Extracted {count} section references")
 
 
@@ -1,12 +1,24 @@
 import json
 import re
 
+from blob_store import resolve
+from url_canon import document_guid, document_url
+
 INPUT_FILE = "data/all_discovered_urls.jsonl"
 OUTPUT_FILE = "data/section_urls.txt"
 
 section_urls = set()
 
-# regex for Westlaw CCR document pages
+
+def add_document(url):
+    # "/calregs/Document/?x" and similar carry no GUID to key on
+    guid = document_guid(url)
+    if guid:
+        section_urls.add(document_url(guid))
+
+
+# regex for Westlaw CCR document pages; URLs are keyed by Document GUID
+# so query-string and casing variants collapse to one canonical URL
 DOC_PATTERN = re.compile(r"https://govt\.westlaw\.com/calregs/Document/[A-Z0-9]+")
 
 with open(INPUT_FILE, "r", encoding="utf-8") as f:
@@ -19,19 +31,19 @@ with open(INPUT_FILE, "r", encoding="utf-8") as f:
         # 1️⃣ direct URL
         url = record.get("url", "")
         if "/calregs/Document/" in url:
-            section_urls.add(url)
+            add_document(url)
 
         # 2️⃣ markdown content
-        markdown = record.get("markdown", "")
+        markdown = resolve(record, "markdown")
         if markdown:
-            matches = DOC_PATTERN.findall(markdown)
-            section_urls.update(matches)
+            for match in DOC_PATTERN.findall(markdown):
+                add_document(match)
 
         # 3️⃣ cleaned HTML
         html = record.get("cleaned_html", "")
         if html:
-            matches = DOC_PATTERN.findall(html)
-            section_urls.update(matches)
+            for match in DOC_PATTERN.findall(html):
+                add_document(match)
 
 with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
     for url in sorted(section_urls):
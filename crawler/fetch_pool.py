@@ -0,0 +1,170 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+import metrics
+
+# --------------------------------------------------
+# Bounded-concurrency fetch pool
+#
+# A fixed number of asyncio workers pull URLs from a bounded queue, every
+# request first takes a token from its host's bucket, and failures are
+# retried with full-jitter exponential backoff. Results are yielded either
+# in input order (reorder buffer) or as soon as they complete.
+# --------------------------------------------------
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 2.0       # requests / second / host
+DEFAULT_BURST = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BASE_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 30.0
+
+
+class FetchError(Exception):
+    """
+    Raised by fetch functions for a failed response. Like any other
+    exception a fetch raises, it is retried until the attempts run out.
+    """
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """One token bucket per host; rate <= 0 disables limiting."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+
+    async def acquire(self, url):
+        if self.rate <= 0:
+            return
+
+        host = urlsplit(url).netloc.lower()
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+
+        await bucket.acquire()
+
+
+def backoff_delay(attempt, base=DEFAULT_BASE_BACKOFF, cap=DEFAULT_MAX_BACKOFF):
+    """Full-jitter exponential backoff for the given 1-based attempt."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+async def fetch_with_retry(fetch, url, limiter, retries=DEFAULT_RETRIES,
+                           base_backoff=DEFAULT_BASE_BACKOFF,
+                           max_backoff=DEFAULT_MAX_BACKOFF):
+    # `retries` counts attempts; always make at least one
+    retries = max(1, retries)
+    for attempt in range(1, retries + 1):
+        await limiter.acquire(url)
+        try:
+            with metrics.span("fetch"):
+                result = await fetch(url)
+            metrics.inc("fetch_total", outcome="ok")
+            return result
+        except Exception as e:
+            if attempt == retries:
+                metrics.inc("fetch_total", outcome="failed")
+                raise
+
+            metrics.inc("fetch_retries_total")
+            delay = backoff_delay(attempt, base_backoff, max_backoff)
+            print(f"⚠️ Retry {attempt}/{retries - 1} for {url} in {delay:.1f}s ({e})")
+            await asyncio.sleep(delay)
+
+
+async def run_pool(urls, fetch, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                   burst=DEFAULT_BURST, retries=DEFAULT_RETRIES,
+                   base_backoff=DEFAULT_BASE_BACKOFF,
+                   max_backoff=DEFAULT_MAX_BACKOFF, ordered=True):
+    """
+    Fetch every URL with `workers` concurrent tasks.
+
+    Async generator yielding (url, result, error) tuples; exactly one of
+    result/error is None. With ordered=True tuples come out in input order,
+    otherwise in completion order.
+    """
+    limiter = HostRateLimiter(rate, burst)
+    todo = asyncio.Queue(maxsize=workers * 2)
+    done = asyncio.Queue(maxsize=workers * 4)
+
+    async def produce():
+        for item in enumerate(urls):
+            await todo.put(item)
+        for _ in range(workers):
+            await todo.put(None)
+
+    async def work():
+        while True:
+            item = await todo.get()
+            if item is None:
+                await done.put(None)
+                return
+
+            index, url = item
+            try:
+                result = await fetch_with_retry(
+                    fetch, url, limiter, retries, base_backoff, max_backoff
+                )
+                await done.put((index, url, result, None))
+            except Exception as e:
+                await done.put((index, url, None, e))
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(work()) for _ in range(workers)]
+
+    try:
+        finished = 0
+        pending = {}
+        next_index = 0
+
+        while finished < workers:
+            item = await done.get()
+            if item is None:
+                finished += 1
+                continue
+
+            index, url, result, error = item
+
+            if not ordered:
+                yield url, result, error
+                continue
+
+            # Reorder buffer: hold completions until their turn comes up
+            pending[index] = (url, result, error)
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
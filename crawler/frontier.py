@@ -0,0 +1,211 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+# --------------------------------------------------
+# Durable crawl frontier
+#
+# One SQLite table per frontier doubles as the queue and the seen-set:
+# the UNIQUE url column rejects duplicates on enqueue, and the
+# (state, seq) index hands out the oldest pending URL without scanning.
+# Every state change is committed, so a killed crawl resumes where it
+# stopped; URLs left in-flight by a crash go back to pending on open.
+# --------------------------------------------------
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+STATES = (PENDING, IN_FLIGHT, DONE, FAILED)
+
+
+class Frontier:
+    def __init__(self, path, name="frontier", checkpoint_every=1):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.checkpoint_every = max(1, checkpoint_every)
+        self._uncommitted = 0
+
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                state TEXT NOT NULL DEFAULT '{PENDING}',
+                depth INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at TEXT
+            )
+        """)
+        self.db.execute(
+            f"CREATE INDEX IF NOT EXISTS {name}_state_seq ON {name}(state, seq)"
+        )
+
+        # Anything in flight when the last run died was never finished
+        self.db.execute(
+            f"UPDATE {name} SET state = ? WHERE state = ?", (PENDING, IN_FLIGHT)
+        )
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, url):
+        row = self.db.execute(
+            f"SELECT 1 FROM {self.name} WHERE url = ?", (url,)
+        ).fetchone()
+        return row is not None
+
+    def _touch(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.db.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.checkpoint()
+        self.db.close()
+
+    def add(self, url, depth=0):
+        """Enqueue url unless it was ever seen. Returns True if it was new."""
+        cur = self.db.execute(
+            f"INSERT OR IGNORE INTO {self.name} (url, depth, updated_at) "
+            "VALUES (?, ?, ?)",
+            (url, depth, datetime.utcnow().isoformat()),
+        )
+        if cur.rowcount:
+            self._touch()
+        return bool(cur.rowcount)
+
+    def add_many(self, urls, depth=0):
+        now = datetime.utcnow().isoformat()
+        cur = self.db.executemany(
+            f"INSERT OR IGNORE INTO {self.name} (url, depth, updated_at) "
+            "VALUES (?, ?, ?)",
+            ((url, depth, now) for url in urls),
+        )
+        self._touch()
+        return cur.rowcount
+
+    def next(self):
+        """Claim the oldest pending URL as in-flight; None when drained."""
+        row = self.db.execute(
+            f"SELECT seq, url, depth FROM {self.name} "
+            "WHERE state = ? ORDER BY seq LIMIT 1",
+            (PENDING,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        seq, url, depth = row
+        self.db.execute(
+            f"UPDATE {self.name} SET state = ?, attempts = attempts + 1, "
+            "updated_at = ? WHERE seq = ?",
+            (IN_FLIGHT, datetime.utcnow().isoformat(), seq),
+        )
+        self._touch()
+        return url, depth
+
+    def _set_state(self, url, state, error=None):
+        self.db.execute(
+            f"UPDATE {self.name} SET state = ?, error = ?, updated_at = ? "
+            "WHERE url = ?",
+            (state, error, datetime.utcnow().isoformat(), url),
+        )
+        self._touch()
+
+    def mark_done(self, url):
+        self._set_state(url, DONE)
+
+    def mark_failed(self, url, error=""):
+        self._set_state(url, FAILED, str(error)[:500])
+
+    def retry_failed(self):
+        """Put every failed URL back in the queue; returns how many."""
+        cur = self.db.execute(
+            f"UPDATE {self.name} SET state = ?, error = NULL WHERE state = ?",
+            (PENDING, FAILED),
+        )
+        self.checkpoint()
+        return cur.rowcount
+
+    def count(self, state=None):
+        if state is None:
+            return self.db.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+        return self.db.execute(
+            f"SELECT COUNT(*) FROM {self.name} WHERE state = ?", (state,)
+        ).fetchone()[0]
+
+    def stats(self):
+        counts = dict.fromkeys(STATES, 0)
+        for state, n in self.db.execute(
+            f"SELECT state, COUNT(*) FROM {self.name} GROUP BY state"
+        ):
+            counts[state] = n
+        return counts
+
+    def urls(self, state=None):
+        if state is None:
+            rows = self.db.execute(f"SELECT url FROM {self.name} ORDER BY seq")
+        else:
+            rows = self.db.execute(
+                f"SELECT url FROM {self.name} WHERE state = ? ORDER BY seq",
+                (state,),
+            )
+        for (url,) in rows:
+            yield url
+
+    def failures(self):
+        yield from self.db.execute(
+            f"SELECT url, error FROM {self.name} WHERE state = ? ORDER BY seq",
+            (FAILED,),
+        )
+
+    def export(self, crawled_path, failed_path):
+        """Write the done / failed URL lists used by the coverage report."""
+        self.checkpoint()
+
+        with open(crawled_path, "w", encoding="utf-8") as f:
+            for url in self.urls(DONE):
+                f.write(url + "\n")
+
+        with open(failed_path, "w", encoding="utf-8") as f:
+            for url, error in self.failures():
+                f.write(f"{url}\t{error or ''}\n")
+
+
+def write_coverage_report(frontier, path, discovered=None, failed_path="failed_urls.txt"):
+    stats = frontier.stats()
+    lines = [
+        "CCR Crawl Coverage Report",
+        "=========================",
+        "",
+        f"Generated: {datetime.utcnow().isoformat()}Z",
+        f"Frontier: {frontier.path} ({frontier.name})",
+        "",
+    ]
+    if discovered is not None:
+        lines.append(f"Discovered CCR section URLs: {discovered}")
+    lines += [
+        f"Pages crawled: {stats[DONE]}",
+        f"Failed crawls: {stats[FAILED]}",
+        f"Still pending: {stats[PENDING] + stats[IN_FLIGHT]}",
+        "",
+        "Failure handling:",
+        f"- Failed URLs are listed in {Path(failed_path).name} with their last error",
+        "- Re-running the crawler resumes from the frontier database;",
+        "  completed URLs are never fetched again",
+        "",
+    ]
+    Path(path).write_text("\n".join(lines), encoding="utf-8")
@@ -0,0 +1,234 @@
+import json
+import re
+from array import array
+from pathlib import Path
+
+# --------------------------------------------------
+# CCR hierarchy tree
+#
+# Title → Division → Part → … → Article → Section, parsed from the
+# Westlaw breadcrumbs: the "[Home] [Title 4. …]" trail + heading on
+# browse pages, and the "Title 17. … / Division 1. …" preamble above
+# "17 CCR § 1234" on section pages (read by section_extractor.extract).
+#
+# The tree is stored flat, in preorder: node i's subtree is exactly the
+# index range [i, end[i]), so enumerating a subtree (or filtering by it,
+# see hier_pos in agent/vector_store.py) is a range check. Levels,
+# parents and subtree ends live in compact arrays; citations and
+# (parent, level, number) children resolve through dicts in O(1).
+# --------------------------------------------------
+
+HIERARCHY_FILE = Path("data/ccr_hierarchy.jsonl")
+
+LEVELS = ("title", "division", "part", "subdivision", "chapter", "subchapter",
+          "group", "subgroup", "article", "subarticle", "section")
+SECTION = LEVELS.index("section")
+
+LEVEL_PATTERN = re.compile(
+    r"^(Title|Division|Part|Subdivision|Chapter|Subchapter|Group|Subgroup|Article|Subarticle)"
+    r"\s+(\d+(?:\.\d+)*[A-Z]?)\.?(?:\s+(.*))?$",
+    re.IGNORECASE
+)
+SCOPE_PATTERN = re.compile(
+    r"(Title|Division|Part|Subdivision|Chapter|Subchapter|Group|Subgroup|Article|Subarticle|Section|§)"
+    r"\s*(\d+(?:\.\d+)*[A-Z]?)",
+    re.IGNORECASE
+)
+BREADCRUMB_LINK = re.compile(r"\[([^\]]+)\]\(")
+
+
+def parse_level(text):
+    """("division", "1", "Food") for "Division 1. Food", else None."""
+    match = LEVEL_PATTERN.match(text.strip())
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2), (match.group(3) or "").strip()
+
+
+def browse_path(markdown: str):
+    """[(level, number, name), ...] for a browse page: breadcrumb trail + heading."""
+    path = []
+    for line in markdown.splitlines():
+        if line.startswith("[Home]("):
+            path = [level for level in map(parse_level, BREADCRUMB_LINK.findall(line)) if level]
+        elif line.startswith("# "):
+            level = parse_level(line[2:])
+            if level is None:
+                return []
+            return path + [level] if (path or level[0] == "title") else []
+    return []
+
+
+def number_key(number):
+    """Natural order for CCR numbers: 2 < 6.5 < 6.50 < 10 < 10A."""
+    key = []
+    for part in number.split("."):
+        digits = re.match(r"\d*", part).group()
+        key.append((int(digits) if digits else 0, part[len(digits):]))
+    return key
+
+
+def parse_scope(text):
+    """(("title", "17"), ("division", "1")) from "Title 17, Division 1"."""
+    return tuple(
+        ("section" if level == "§" else level.lower(), number)
+        for level, number in SCOPE_PATTERN.findall(text)
+    )
+
+
+class HierarchyTree:
+    def __init__(self, levels, numbers, names, parents, ends, citations):
+        self.level = array("b", levels)
+        self.parent = array("i", parents)
+        self.end = array("i", ends)
+        self.number = list(numbers)
+        self.name = list(names)
+        self.citation = list(citations)
+
+        self.children = {
+            (parent, LEVELS[level], number): i
+            for i, (parent, level, number) in enumerate(zip(self.parent, self.level, self.number))
+        }
+        self.by_citation = {c: i for i, c in enumerate(self.citation) if c}
+
+    def __len__(self):
+        return len(self.level)
+
+    # ---------- build ----------
+
+    @classmethod
+    def build(cls, paths):
+        """
+        paths: iterable of ([(level, number, name), ...], citation). A
+        citation makes the last element a section leaf; interior paths
+        (from browse pages) pass citation=None.
+        """
+        root = {}
+        for path, citation in paths:
+            children = root
+            for i, (level, number, name) in enumerate(path):
+                node = children.setdefault((level, number), {"name": "", "citation": None,
+                                                             "children": {}})
+                node["name"] = node["name"] or name
+                if citation and i == len(path) - 1:
+                    node["citation"] = citation
+                children = node["children"]
+
+        levels, numbers, names, parents, ends, citations = [], [], [], [], [], []
+
+        def order(item):
+            (level, number), _ = item
+            return LEVELS.index(level), number_key(number)
+
+        # Iterative preorder; a node's end is filled in once its subtree is out
+        stack = [(item, -1) for item in sorted(root.items(), key=order, reverse=True)]
+        open_nodes = []
+        while stack:
+            ((level, number), node), parent = stack.pop()
+            while open_nodes and open_nodes[-1] != parent:
+                ends[open_nodes.pop()] = len(levels)
+
+            position = len(levels)
+            levels.append(LEVELS.index(level))
+            numbers.append(number)
+            names.append(node["name"])
+            parents.append(parent)
+            ends.append(position + 1)
+            citations.append(node["citation"])
+            open_nodes.append(position)
+
+            stack.extend((child, position) for child in
+                         sorted(node["children"].items(), key=order, reverse=True))
+
+        for position in open_nodes:
+            ends[position] = len(levels)
+
+        return cls(levels, numbers, names, parents, ends, citations)
+
+    # ---------- persistence ----------
+
+    def save(self, path=HIERARCHY_FILE):
+        path = Path(path)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for i in range(len(self)):
+                f.write(json.dumps({
+                    "pos": i,
+                    "level": LEVELS[self.level[i]],
+                    "number": self.number[i],
+                    "name": self.name[i],
+                    "parent": self.parent[i],
+                    "end": self.end[i],
+                    "citation": self.citation[i],
+                }, ensure_ascii=False) + "\n")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path=HIERARCHY_FILE):
+        columns = ([], [], [], [], [], [])
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                node = json.loads(line)
+                for column, value in zip(columns, (
+                    LEVELS.index(node["level"]), node["number"], node["name"],
+                    node["parent"], node["end"], node["citation"],
+                )):
+                    column.append(value)
+        return cls(*columns)
+
+    # ---------- queries ----------
+
+    def label(self, i):
+        level = LEVELS[self.level[i]]
+        if level == "section":
+            return f"§ {self.number[i]}"
+        return f"{level.title()} {self.number[i]}"
+
+    def path(self, i):
+        """Labels from the title down to node i."""
+        labels = []
+        while i != -1:
+            labels.append(self.label(i))
+            i = self.parent[i]
+        return labels[::-1]
+
+    def subtree(self, i):
+        return range(i, self.end[i])
+
+    def sections(self, i):
+        """Citations of every section under node i, in CCR order."""
+        return [self.citation[j] for j in self.subtree(i) if self.level[j] == SECTION]
+
+    def find(self, scope):
+        """
+        Node for a citation ("17 CCR § 1234") or a scope such as
+        "Title 17 Division 1"; intermediate levels may be skipped
+        ("Title 8 Article 3"). None when nothing matches.
+        """
+        if isinstance(scope, str):
+            if scope in self.by_citation:
+                return self.by_citation[scope]
+            scope = parse_scope(scope)
+        if not scope:
+            return None
+
+        node = -1
+        for level, number in scope:
+            child = self.children.get((node, level, number))
+            if child is None:
+                # Skipped levels: first match in preorder inside the subtree
+                span = range(len(self)) if node == -1 else range(node + 1, self.end[node])
+                child = next((j for j in span if LEVELS[self.level[j]] == level
+                              and self.number[j] == number), None)
+                if child is None:
+                    return None
+            node = child
+        return node
+
+
+def load_tree(path=HIERARCHY_FILE):
+    """The saved tree, or None before build_ccr_hierarchy.py has run."""
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    return HierarchyTree.load(path)
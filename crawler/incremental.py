@@ -0,0 +1,142 @@
+import hashlib
+import json
+import re
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+from section_extractor import BODY_MARKER
+
+# --------------------------------------------------
+# Incremental recrawl support
+#
+# Per-URL validators (ETag / Last-Modified) and a hash of the normalized
+# markdown live in STATE_FILE next to sections_content.jsonl. A recrawl
+# writes MANIFEST_FILE listing which source URLs were added, changed or
+# removed; downstream stages read it to touch only that delta.
+# --------------------------------------------------
+
+STATE_FILE = Path("data/sections_state.json")
+MANIFEST_FILE = Path("data/crawl_manifest.json")
+
+# Westlaw bumps its static asset version on every deploy
+VOLATILE_PATTERN = re.compile(r"WeblinksStaticContent_[\d.]+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+PROBE_TIMEOUT = 15
+
+
+def normalize_markdown(markdown: str):
+    """Reduce page markdown to the part that changes when the law does."""
+    start = markdown.find(BODY_MARKER)
+    if start != -1:
+        markdown = markdown[start:]
+
+    markdown = VOLATILE_PATTERN.sub("", markdown)
+    return WHITESPACE_PATTERN.sub(" ", markdown).strip()
+
+
+def content_hash(markdown: str):
+    return hashlib.sha256(normalize_markdown(markdown or "").encode("utf-8")).hexdigest()
+
+
+def load_state(path=STATE_FILE):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_state(state, path=STATE_FILE):
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def probe(url, entry):
+    """
+    Conditional HEAD request using the stored validators.
+
+    Returns (not_modified, validators). Network errors count as
+    "modified" so the full crawl decides what happened.
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    request = urllib.request.Request(url, headers=headers, method="HEAD")
+
+    try:
+        with urllib.request.urlopen(request, timeout=PROBE_TIMEOUT) as resp:
+            return False, {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and headers:
+            return True, {}
+        return False, {}
+    except (urllib.error.URLError, OSError):
+        return False, {}
+
+
+def state_entry(record_url, markdown, validators):
+    return {
+        "record_url": record_url,
+        "content_hash": content_hash(markdown),
+        "etag": validators.get("etag"),
+        "last_modified": validators.get("last_modified"),
+        "fetched_at": datetime.utcnow().isoformat(),
+    }
+
+
+def write_manifest(added, changed, removed, unchanged, path=MANIFEST_FILE):
+    manifest = {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "added": sorted(added),
+        "changed": sorted(changed),
+        "removed": sorted(removed),
+        "unchanged": unchanged,
+    }
+    Path(path).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """Returns (delta, removed): URLs to (re)process and URLs to drop."""
+    manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+    delta = set(manifest["added"]) | set(manifest["changed"])
+    return delta, set(manifest["removed"])
+
+
+def merge_delta(existing_file, output_file, key, delta, removed, new_records):
+    """
+    Rewrite a JSONL stage output: keep existing records untouched by the
+    manifest, drop removed and reprocessed ones, append new_records.
+    """
+    existing_file = Path(existing_file)
+    tmp = Path(output_file).with_suffix(".tmp")
+    kept = added = 0
+
+    with tmp.open("w", encoding="utf-8") as out:
+        if existing_file.exists():
+            with existing_file.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get(key) in delta or record.get(key) in removed:
+                        continue
+                    out.write(line if line.endswith("\n") else line + "\n")
+                    kept += 1
+
+        for record in new_records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            added += 1
+
+    tmp.replace(output_file)
+    return kept, added
@@ -0,0 +1,222 @@
+import atexit
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# --------------------------------------------------
+# Shared stage metrics + profiling hooks
+#
+# Process-wide counters, histograms and spans used by both crawler/ and
+# agent/ entry points. A span times a block into the ccr_stage_seconds
+# histogram under its stage label. Nothing is written unless an entry
+# point asks for it (--metrics PATH / CCR_METRICS_FILE): at exit the
+# registry is dumped as Prometheus text (.prom / .txt) or JSON (.json).
+#
+# With --profile DIR (CCR_PROFILE_DIR) every span also runs under a
+# cProfile.Profile kept per stage; DIR/<stage>.prof files are written at
+# exit (open with pstats or snakeviz). One span profiles at a time:
+# nested or concurrent spans (server threads, asyncio fetches) are timed
+# but land in the profile of the span that was already running.
+# Process-pool workers keep their own registry, so profile with
+# --workers 1 to see parse internals.
+# --------------------------------------------------
+
+PREFIX = "ccr_"
+STAGE_HISTOGRAM = "stage_seconds"
+
+# Seconds; also used for other histograms unless buckets= is given
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS_ENV = "CCR_METRICS_FILE"
+PROFILE_ENV = "CCR_PROFILE_DIR"
+
+
+def _key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+        self.profile_dir = None
+        self.profiles = {}
+        self.profiling = False
+
+    # ---------- recording ----------
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[_key(labels)] = series.get(_key(labels), 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(_key(labels))
+            if histogram is None:
+                histogram = series[_key(labels)] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        profile = self._start_profile(stage)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_HISTOGRAM, time.perf_counter() - started, stage=stage, **labels)
+            if profile is not None:
+                profile.disable()
+                with self.lock:
+                    self.profiling = False
+
+    def _start_profile(self, stage):
+        if self.profile_dir is None:
+            return None
+        with self.lock:
+            if self.profiling:
+                return None
+            profile = self.profiles.setdefault(stage, cProfile.Profile())
+            try:
+                profile.enable()
+            except ValueError:
+                # Some other profiler (or debugger) owns the hook
+                return None
+            self.profiling = True
+        return profile
+
+    # ---------- export ----------
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [
+                    {"name": PREFIX + name, "labels": dict(key), "value": value}
+                    for name, series in sorted(self.counters.items())
+                    for key, value in series.items()
+                ],
+                "histograms": [
+                    {"name": PREFIX + name, "labels": dict(key), "count": h.count,
+                     "sum": round(h.sum, 6),
+                     "buckets": {str(bound): n for bound, n in h.cumulative()}}
+                    for name, series in sorted(self.histograms.items())
+                    for key, h in series.items()
+                ],
+            }
+
+    def prometheus(self):
+        lines = []
+
+        def labels_text(labels, **extra):
+            pairs = {**labels, **extra}
+            if not pairs:
+                return ""
+            body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs.items())
+            return "{" + body + "}"
+
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                for key, value in series.items():
+                    lines.append(f"{PREFIX}{name}{labels_text(dict(key))} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                for key, h in series.items():
+                    labels = dict(key)
+                    for bound, total in h.cumulative():
+                        lines.append(f"{PREFIX}{name}_bucket{labels_text(labels, le=bound)} {total}")
+                    lines.append(f"{PREFIX}{name}_bucket{labels_text(labels, le='+Inf')} {h.count}")
+                    lines.append(f"{PREFIX}{name}_sum{labels_text(labels)} {h.sum:.6f}")
+                    lines.append(f"{PREFIX}{name}_count{labels_text(labels)} {h.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".json":
+            text = json.dumps(self.snapshot(), indent=2)
+        else:
+            text = self.prometheus()
+
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(path)
+
+    def dump_profiles(self):
+        if self.profile_dir is None:
+            return []
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        with self.lock:
+            for stage, profile in self.profiles.items():
+                path = self.profile_dir / f"{stage}.prof"
+                profile.dump_stats(path)
+                written.append(path)
+        return written
+
+
+REGISTRY = Registry()
+
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+span = REGISTRY.span
+
+
+def add_arguments(parser):
+    """--metrics / --profile flags shared by every entry point."""
+    parser.add_argument("--metrics", metavar="PATH", default=os.environ.get(METRICS_ENV),
+                        help="write stage metrics at exit (.prom text or .json)")
+    parser.add_argument("--profile", metavar="DIR", default=os.environ.get(PROFILE_ENV),
+                        help="cProfile every stage; writes DIR/<stage>.prof at exit")
+
+
+def setup(metrics_path=None, profile_dir=None):
+    """Enable profiling and register the exit-time dumps."""
+    if profile_dir:
+        REGISTRY.profile_dir = Path(profile_dir)
+
+    def finish():
+        if metrics_path:
+            REGISTRY.write(metrics_path)
+            print(f"📊 Metrics written to {metrics_path}")
+        for path in REGISTRY.dump_profiles():
+            print(f"🔬 Profile written to {path}")
+
+    if metrics_path or profile_dir:
+        atexit.register(finish)
+
+
+def setup_from_args(args):
+    setup(getattr(args, "metrics", None), getattr(args, "profile", None))
@@ -0,0 +1,96 @@
+import html as html_lib
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# --------------------------------------------------
+# Parallel parse stage
+#
+# parallel_map() fans records out to a process pool in chunks and yields
+# results in input order, keeping only a few chunks in flight so huge
+# inputs stream instead of being submitted all at once.
+#
+# iter_hrefs() / iter_anchors() pull links straight out of the raw HTML
+# with compiled regexes instead of building a BeautifulSoup tree just to
+# read <a href> attributes.
+# --------------------------------------------------
+
+DEFAULT_CHUNKSIZE = 64
+CHUNKS_PER_WORKER = 2
+
+ANCHOR_PATTERN = re.compile(r"<a\b([^>]*)>(.*?)</a\s*>", re.IGNORECASE | re.DOTALL)
+HREF_TAG_PATTERN = re.compile(
+    r"""<a\b[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""",
+    re.IGNORECASE,
+)
+HREF_ATTR_PATTERN = re.compile(
+    r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""",
+    re.IGNORECASE,
+)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_PATTERN = re.compile(r"\s+")
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _apply_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def parallel_map(func, items, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Ordered, streaming equivalent of map(func, items) over a process pool.
+
+    func must be a module-level (picklable) function. workers <= 1 runs
+    in-process, and so do inputs smaller than one chunk, which would not
+    pay back the cost of starting the pool.
+    """
+    workers = workers or default_workers()
+    if workers <= 1:
+        yield from map(func, items)
+        return
+
+    it = iter(items)
+    first = list(islice(it, chunksize))
+    if len(first) < chunksize:
+        yield from map(func, first)
+        return
+
+    window = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunk = first
+        while chunk:
+            window.append(pool.submit(_apply_chunk, func, chunk))
+            if len(window) >= workers * CHUNKS_PER_WORKER:
+                yield from window.popleft().result()
+            chunk = list(islice(it, chunksize))
+
+        while window:
+            yield from window.popleft().result()
+
+
+def _first_group(match):
+    return html_lib.unescape(match.group(1) or match.group(2) or match.group(3) or "")
+
+
+def iter_hrefs(html: str):
+    """Yield the href of every <a> tag, in document order."""
+    for match in HREF_TAG_PATTERN.finditer(html):
+        yield _first_group(match)
+
+
+def iter_anchors(html: str):
+    """Yield (href, text) for every <a>...</a>; href is None when absent."""
+    for match in ANCHOR_PATTERN.finditer(html):
+        attrs, inner = match.groups()
+
+        href_match = HREF_ATTR_PATTERN.search(attrs)
+        href = _first_group(href_match) if href_match else None
+
+        text = html_lib.unescape(TAG_PATTERN.sub("", inner))
+        yield href, SPACE_PATTERN.sub(" ", text).strip()
@@ -0,0 +1,95 @@
+import re
+
+# --------------------------------------------------
+# Single-pass section page extractor
+#
+# A Westlaw section page is navigation junk followed by the document:
+#
+#   Barclays California Code of Regulations
+#   Title 10. Investment                      ← preamble, one line per level
+#   Chapter 6.52. Defense Adjustment …
+#   10 CCR § 4020.4                           ← citation line
+#   **§ 4020.4. Application. General Information.**
+#   [Currentness](…)
+#   The Application shall contain …          ← body
+#   ## Credits / Note: Authority cited … / HISTORY / "This database is current …"
+#
+# The body marker is found once with str.find. From there one compiled
+# pattern matches the preamble, citation line and heading. The search for
+# the end of the body resumes where that match stopped, so every
+# character after the marker is examined once. Together they yield title,
+# division, chapter and article (the preamble), section number and name
+# ("§§ 1 through 116" ranges keep the first number), and the cleaned
+# body. Nothing before the marker is scanned, so nav links can't produce
+# a false "Title 1." or "§ 2" match.
+# --------------------------------------------------
+
+# Westlaw's document header: everything before it is site navigation
+BODY_MARKER = "Barclays California Code of Regulations"
+
+LEVEL_WORDS = "Title|Division|Part|Subdivision|Chapter|Subchapter|Group|Subgroup|Article|Subarticle"
+NUMBER = r"\d+(?:\.\d+)*[a-z]?"
+
+# Westlaw annotation on level names, not part of the name
+REFS_ANNOS = " (Refs & Annos)"
+
+HEAD_PATTERN = re.compile(rf"""
+    ^(?P<preamble>(?:(?:{LEVEL_WORDS})[ \t]+\d[^\n]*\n)*)
+    (?P<title>\d+)[ \t]+CCR[ \t](?:§§?[ \t]*(?P<cited>{NUMBER}))?[^\n]*\n
+    (?:\*\*§§?[ \t]*(?P<number>{NUMBER})\.?[ \t]*(?P<name>[^\n]*?)\*\*[^\n]*\n)?
+    (?:\[Currentness\][^\n]*\n)?
+""", re.MULTILINE | re.VERBOSE)
+
+# One preamble line: ("Division", "1", "Food")
+LEVEL_LINE = re.compile(rf"^({LEVEL_WORDS})[ \t]+(\d+(?:\.\d+)*[A-Z]?)\.?[ \t]*([^\n]*?)[ \t]*$",
+                        re.MULTILINE)
+
+# Credits / authority note / history, or the database currency footer on
+# pages that have none of those: the end of the regulation text
+BODY_END = re.compile(r"\n(?:## Credits|Note: Authority cited|HISTORY\b|This database is current\b)")
+
+FIELDS = ("title_number", "title_name", "division", "chapter", "article",
+          "hierarchy", "section_number", "section_name", "body")
+
+
+def extract(markdown: str):
+    """
+    Every metadata field of a section page plus its body, in one scan.
+    Fields the page doesn't have are None (hierarchy is [], body falls
+    back to everything after the marker).
+    """
+    fields = dict.fromkeys(FIELDS)
+    fields["hierarchy"] = []
+
+    start = markdown.find(BODY_MARKER)
+    start = 0 if start == -1 else start + len(BODY_MARKER)
+
+    match = HEAD_PATTERN.search(markdown, start)
+    if match is None:
+        fields["body"] = markdown[start:].strip()
+        return fields
+
+    path = [(level.lower(), number, name) for level, number, name in
+            LEVEL_LINE.findall(match.group("preamble"))]
+    if path and path[0][0] == "title":
+        fields["hierarchy"] = path
+        fields["title_name"] = path[0][2].removesuffix(REFS_ANNOS) or None
+        for level, number, _ in path:
+            if level in ("division", "chapter", "article"):
+                fields[level] = fields[level] or number
+
+    # From the head's trailing newline: an empty body ends right there
+    end = BODY_END.search(markdown, match.end() - 1)
+    fields["title_number"] = match.group("title")
+    fields["section_number"] = match.group("number") or match.group("cited")
+    fields["section_name"] = (match.group("name") or "").strip() or None
+    fields["body"] = markdown[match.end():end.start() if end else len(markdown)].strip()
+    return fields
+
+
+def record_body(record):
+    """A cleaned record's body; extracted again only for records written without one."""
+    body = record.get("body")
+    if body is None:
+        body = extract(record.get("content_markdown") or "")["body"]
+    return body
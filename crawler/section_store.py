@@ -0,0 +1,256 @@
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+
+from section_extractor import record_body
+
+# --------------------------------------------------
+# SQLite section store
+#
+# One row per section (keyed by source_url) with a column for every
+# canonical schema field, so clean → enrich → index can read and write
+# a single database instead of rescanning whole JSONL files:
+#
+#   - point lookups by source_url / citation / title_number hit B-tree
+#     indexes
+#   - an FTS5 table over the regulation body (the body column, kept in
+#     sync by triggers) answers keyword filters without reading bodies or
+#     matching the page's navigation and footer
+#   - bulk writes run in one transaction each, so a failed stage leaves
+#     the previous contents intact
+#
+# Stages opt in with --store; the JSONL files stay the default.
+# --------------------------------------------------
+
+STORE_FILE = Path("data/ccr_sections.db")
+
+COLUMNS = ("source_url", "title_number", "title_name", "division", "chapter", "article",
+           "hierarchy", "section_number", "section_name", "citation", "breadcrumb_path",
+           "content_markdown", "body", "retrieved_at")
+
+# Stored as JSON text
+JSON_COLUMNS = {"hierarchy"}
+
+# enrich_sections.enrich_record fills these in on top of a cleaned row
+ENRICHED_COLUMNS = ("citation", "breadcrumb_path", "retrieved_at")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    {", ".join(f"{column} TEXT" for column in COLUMNS)},
+    extra TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS sections_source_url ON sections(source_url);
+CREATE INDEX IF NOT EXISTS sections_citation ON sections(citation);
+CREATE INDEX IF NOT EXISTS sections_title_number ON sections(title_number);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    body, content='sections', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS sections_fts_insert AFTER INSERT ON sections BEGIN
+    INSERT INTO sections_fts(rowid, body) VALUES (new.id, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_fts_delete AFTER DELETE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, body) VALUES ('delete', old.id, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_fts_update AFTER UPDATE OF body ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, body) VALUES ('delete', old.id, old.body);
+    INSERT INTO sections_fts(rowid, body) VALUES (new.id, new.body);
+END;
+"""
+
+UPSERT = (
+    f"INSERT INTO sections ({', '.join(COLUMNS)}, extra) "
+    f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))}) "
+    f"ON CONFLICT(source_url) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in (*COLUMNS[1:], "extra"))
+)
+
+
+def _row(record):
+    # JSONL cleaned before records carried a body still gets one
+    record = {**record, "body": record_body(record)}
+    values = [
+        json.dumps(record.get(column), ensure_ascii=False) if column in JSON_COLUMNS
+        else record.get(column)
+        for column in COLUMNS
+    ]
+    extra = {k: v for k, v in record.items() if k not in COLUMNS}
+    values.append(json.dumps(extra, ensure_ascii=False) if extra else None)
+    return values
+
+
+def _record(row):
+    record = dict(zip(COLUMNS, row[1:]))
+    for column in JSON_COLUMNS:
+        if record[column] is not None:
+            record[column] = json.loads(record[column])
+    if row[-1]:
+        record.update(json.loads(row[-1]))
+    return record
+
+
+def _fts_term(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class SectionStore:
+    def __init__(self, path=STORE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    # ---------- writes (one transaction each) ----------
+
+    def write(self, records, replace=False):
+        """
+        Upsert records by source_url. replace=True first empties the store,
+        so it ends up holding exactly these records. Records without a
+        source_url are skipped. Returns how many were written.
+        """
+        written = 0
+
+        def rows():
+            nonlocal written
+            for record in records:
+                if record.get("source_url"):
+                    written += 1
+                    yield _row(record)
+
+        with self.db:
+            if replace:
+                self.db.execute("DELETE FROM sections")
+            self.db.executemany(UPSERT, rows())
+        return written
+
+    def update(self, records, columns=ENRICHED_COLUMNS):
+        """Set only `columns` on existing rows (by source_url); returns rows touched."""
+        sql = (f"UPDATE sections SET {', '.join(f'{c} = ?' for c in columns)} "
+               "WHERE source_url = ?")
+        with self.db:
+            cur = self.db.executemany(sql, (
+                [record.get(c) for c in columns] + [record.get("source_url")]
+                for record in records
+            ))
+        return cur.rowcount
+
+    def delete(self, source_urls):
+        with self.db:
+            cur = self.db.executemany("DELETE FROM sections WHERE source_url = ?",
+                                      ((url,) for url in source_urls))
+        return cur.rowcount
+
+    # ---------- reads ----------
+
+    def _select(self, where="", params=()):
+        return self.db.execute(f"SELECT id, {', '.join(COLUMNS)}, extra FROM sections "
+                               f"{where} ORDER BY id", params)
+
+    def records(self, delta=None):
+        """Every record in insertion order; with delta, only those source_urls."""
+        if delta is None:
+            for row in self._select():
+                yield _record(row)
+            return
+        for url in sorted(delta):
+            record = self.get(url)
+            if record is not None:
+                yield record
+
+    def get(self, source_url):
+        row = self._select("WHERE source_url = ?", (source_url,)).fetchone()
+        return _record(row) if row else None
+
+    def by_citation(self, citation):
+        return [_record(row) for row in self._select("WHERE citation = ?", (citation,))]
+
+    def by_title(self, title_number):
+        return [_record(row) for row in self._select("WHERE title_number = ?",
+                                                     (str(title_number),))]
+
+    def entry(self, doc):
+        """{"url", "section_title"} for a row id from search()."""
+        row = self.db.execute(
+            "SELECT source_url, citation, section_name FROM sections WHERE id = ?", (doc,)
+        ).fetchone()
+        if row is None:
+            return None
+        url, citation, name = row
+        title = " – ".join(part for part in (citation, name) if part)
+        return {"url": url, "section_title": title or "Unknown Section"}
+
+    def match(self, query):
+        """Row ids whose body matches an FTS5 query, in id order."""
+        return [doc for (doc,) in self.db.execute(
+            "SELECT rowid FROM sections_fts WHERE sections_fts MATCH ? ORDER BY rowid", (query,)
+        )]
+
+    def search(self, terms, mode="any"):
+        """
+        {row id: [matched terms, in the order given]}, the same contract as
+        InvertedIndex.search but answered from the FTS5 index.
+        """
+        terms = list(dict.fromkeys(terms))
+        if not terms:
+            return {}
+
+        if mode == "all":
+            return {doc: list(terms)
+                    for doc in self.match(" AND ".join(map(_fts_term, terms)))}
+
+        if mode != "any":
+            raise ValueError(f"unknown match mode: {mode}")
+
+        matches = {}
+        for term in terms:
+            for doc in self.match(_fts_term(term)):
+                matches.setdefault(doc, []).append(term)
+        return dict(sorted(matches.items()))
+
+
+def add_arguments(parser):
+    """--store [PATH]: read/write sections through the SQLite store."""
+    parser.add_argument("--store", nargs="?", const=str(STORE_FILE), metavar="PATH",
+                        help=f"use the SQLite section store (default {STORE_FILE}) "
+                             "instead of the JSONL files")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load cleaned/enriched JSONL into the section store")
+    parser.add_argument("files", nargs="+", type=Path,
+                        help="e.g. data/ccr_sections_enriched.jsonl; later files win per source_url")
+    parser.add_argument("--output", default=str(STORE_FILE))
+    parser.add_argument("--replace", action="store_true",
+                        help="empty the store first")
+    args = parser.parse_args()
+
+    with SectionStore(args.output) as store:
+        for i, path in enumerate(args.files):
+            with path.open("r", encoding="utf-8") as f:
+                records = (json.loads(line) for line in f if line.strip())
+                count = store.write(records, replace=args.replace and i == 0)
+            print(f"✅ {path}: {count} sections loaded")
+        print(f"🗄️ Section store {args.output}: {len(store)} sections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import hashlib
+import re
+from array import array
+from bisect import bisect_left
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# --------------------------------------------------
+# URL canonicalization for govt.westlaw.com CCR pages
+#
+# The same Westlaw document shows up with different query strings,
+# fragments, host casing and relative forms. canonicalize() maps all of
+# them onto one fetchable URL: Document pages become the FullText view of
+# their GUID, Browse pages keep only the query parameters that select
+# content. SeenSet remembers canonical URLs as 64-bit fingerprints so a
+# full-CCR discovery run (~100k documents) stays within a few MB.
+# --------------------------------------------------
+
+HOST = "govt.westlaw.com"
+BASE_URL = f"https://{HOST}"
+CCR_PREFIX = "/calregs"
+
+GUID_PATTERN = re.compile(r"/calregs/Document/([A-Za-z0-9]+)", re.IGNORECASE)
+
+DOCUMENT_QUERY = (
+    "viewType=FullText&originationContext=documenttoc"
+    "&transitionType=CategoryPageItem&contextData=(sc.Default)"
+)
+
+# Navigation/tracking parameters that never change which page is served
+IGNORED_PARAMS = {
+    "transitiontype", "contextdata", "originationcontext", "viewtype",
+    "bhcp", "rs", "vr", "navigationpath", "listsource", "list", "rank",
+}
+
+
+def document_guid(url):
+    """Westlaw Document GUID in a URL (upper-cased), or None."""
+    match = GUID_PATTERN.search(url or "")
+    return match.group(1).upper() if match else None
+
+
+def document_url(guid):
+    return f"{BASE_URL}{CCR_PREFIX}/Document/{guid.upper()}?{DOCUMENT_QUERY}"
+
+
+def canonicalize(href, base=BASE_URL):
+    """
+    Canonical absolute URL for a CCR link, or None when the link points
+    outside the CCR (other hosts, javascript:, mailto:, ...).
+    """
+    if not href:
+        return None
+
+    href = href.strip()
+    parts = urlsplit(urljoin(base, href))
+
+    if parts.scheme not in ("http", "https") or parts.netloc.lower() != HOST:
+        return None
+
+    path = parts.path
+    if not path.lower().startswith(CCR_PREFIX):
+        return None
+    path = CCR_PREFIX + path[len(CCR_PREFIX):].rstrip("/")
+
+    guid = document_guid(path)
+    if guid:
+        return document_url(guid)
+
+    params = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key.lower() in IGNORED_PARAMS:
+            continue
+        if key.lower() == "guid":
+            value = value.upper()
+        params.append((key, value))
+    params.sort()
+
+    return urlunsplit(("https", HOST, path, urlencode(params), ""))
+
+
+def url_key(url):
+    """Identity of a canonical URL: its GUID, or the case-folded URL."""
+    return document_guid(url) or url.lower()
+
+
+def fingerprint(url):
+    digest = hashlib.blake2b(url_key(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class SeenSet:
+    """
+    Set of URLs stored as 64-bit fingerprints: probabilistic on its own.
+
+    A miss is definitive, but two URLs can share a fingerprint (roughly
+    n²/2⁶⁵ odds, ~3e-10 at 100k URLs), and then the second would be
+    reported as seen. Pass `exact`, a callable answering membership
+    exactly (e.g. a Frontier's UNIQUE url lookup), and fingerprint hits
+    are confirmed with it, so only repeats pay for the exact check.
+
+    New fingerprints go into a small Python set; once it grows past an
+    eighth of the bulk store it is merged into a sorted array('Q') that
+    costs 8 bytes per URL and is searched with bisect.
+    """
+
+    MIN_BUFFER = 4096
+
+    def __init__(self, urls=(), exact=None):
+        self._sorted = array("Q")
+        self._recent = set()
+        self.exact = exact
+        for url in urls:
+            self.add(url)
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def _in_sorted(self, fp):
+        i = bisect_left(self._sorted, fp)
+        return i < len(self._sorted) and self._sorted[i] == fp
+
+    def _has(self, fp, url):
+        if fp not in self._recent and not self._in_sorted(fp):
+            return False
+        return self.exact is None or self.exact(url)
+
+    def __contains__(self, url):
+        return self._has(fingerprint(url), url)
+
+    def add(self, url):
+        """Add url; returns True if it had not been seen before."""
+        fp = fingerprint(url)
+        if self._has(fp, url):
+            return False
+        if fp in self._recent or self._in_sorted(fp):
+            # Fingerprint collision: `exact` now decides for this URL
+            return True
+
+        self._recent.add(fp)
+        if len(self._recent) > max(self.MIN_BUFFER, len(self._sorted) // 8):
+            self._merge()
+        return True
+
+    def _merge(self):
+        # Timsort merges the two sorted runs in linear time
+        self._sorted = array("Q", sorted(self._sorted.tolist() + sorted(self._recent)))
+        self._recent.clear()
+
+    def nbytes(self):
+        # Approximate: array payload + per-entry cost of the small set
+        return self._sorted.itemsize * len(self._sorted) + 60 * len(self._recent)